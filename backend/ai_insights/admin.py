@@ -1,3 +1,26 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CLASS_FEATURE, CategorizerCount, ReceiptScanJob
+
+
+@admin.register(CategorizerCount)
+class CategorizerCountAdmin(admin.ModelAdmin):
+    list_display = ['user', 'category', 'count']
+    list_filter = ['category']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'category', 'feature', 'count']
+    
+    def get_queryset(self, request):
+        # Per-feature rows are hashed and only meaningful to the classifier
+        return super().get_queryset(request).filter(feature=CLASS_FEATURE).select_related('user')
+
+
+@admin.register(ReceiptScanJob)
+class ReceiptScanJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'image', 'result', 'error', 'attempts', 'created_at', 'started_at', 'finished_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
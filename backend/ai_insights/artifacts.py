@@ -0,0 +1,177 @@
+# backend/ai_insights/artifacts.py - VERSIONED, MEMORY-MAPPED MODEL ARTIFACTS
+"""
+Models are published as flat .npy arrays under settings.ML_ARTIFACT_DIR:
+
+    categorizer/
+        CURRENT                         name of the live version
+        20261018T101500123456-3f2a9c1e/
+            meta.json                   format, hash space, class order, stats
+            keys.npy                    sorted hashed feature ids (int64)
+            values.npy                  (n_classes, n_keys) float32 counts
+            class_counts.npy
+            feature_totals.npy
+
+A version directory is fully written under a dot-prefixed staging name and
+renamed into place before CURRENT is swapped with os.replace, so readers
+never see a partial version. Workers memory-map the arrays on first use;
+every process shares the same pages through the OS page cache, and a new
+version is picked up when CURRENT changes.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .classifier import CLASSES, N_FEATURES, NaiveBayesModel
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+CATEGORIZER = 'categorizer'
+POINTER_NAME = 'CURRENT'
+POINTER_CHECK_INTERVAL = 5  # seconds between reads of the version pointer
+MAPPED_ARRAYS = ('keys', 'values')
+LOADED_ARRAYS = ('class_counts', 'feature_totals')
+
+
+class ArtifactError(Exception):
+    """Raised when a published version cannot be used by this code"""
+
+
+def artifact_root(name):
+    return Path(settings.ML_ARTIFACT_DIR) / name
+
+
+def _write_durably(path, write):
+    with open(path, 'wb') as handle:
+        write(handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def publish_model(model, name=CATEGORIZER, keep=3, **meta):
+    """Write `model` as a new version, point CURRENT at it and prune old versions"""
+    root = artifact_root(name)
+    root.mkdir(parents=True, exist_ok=True)
+    version = f"{timezone.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+    staging = Path(tempfile.mkdtemp(prefix=f'.{version}-', dir=root))
+    try:
+        for array_name in MAPPED_ARRAYS + LOADED_ARRAYS:
+            array = np.ascontiguousarray(getattr(model, array_name))
+            _write_durably(staging / f'{array_name}.npy', lambda handle: np.save(handle, array))
+        meta = {
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'n_features': N_FEATURES,
+            'classes': CLASSES,
+            'examples': model.n_examples,
+            'created_at': timezone.now().isoformat(),
+            **meta,
+        }
+        _write_durably(staging / 'meta.json', lambda handle: handle.write(json.dumps(meta).encode('utf-8')))
+        os.rename(staging, root / version)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_tmp = root / f'.{POINTER_NAME}.{version}'
+    _write_durably(pointer_tmp, lambda handle: handle.write(version.encode('ascii')))
+    os.replace(pointer_tmp, root / POINTER_NAME)
+
+    prune_versions(name, keep)
+    return version
+
+
+def current_version(name=CATEGORIZER):
+    try:
+        return (artifact_root(name) / POINTER_NAME).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def prune_versions(name=CATEGORIZER, keep=3):
+    """
+    Delete all but the newest `keep` versions (never the current one).
+    Processes still mapping a deleted version keep their pages until they
+    move on to the new one.
+    """
+    root = artifact_root(name)
+    current = current_version(name)
+    versions = sorted(path for path in root.iterdir() if path.is_dir() and not path.name.startswith('.'))
+    for path in versions[:max(len(versions) - keep, 0)]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_model(name, version):
+    """Memory-map a published categorizer version"""
+    path = artifact_root(name) / version
+    meta = json.loads((path / 'meta.json').read_text())
+    if meta.get('format') != ARTIFACT_FORMAT or meta.get('n_features') != N_FEATURES or meta.get('classes') != CLASSES:
+        raise ArtifactError(f'{name} version {version} was built for a different feature space or class list')
+    arrays = {array_name: np.load(path / f'{array_name}.npy', mmap_mode='r') for array_name in MAPPED_ARRAYS}
+    arrays.update({array_name: np.load(path / f'{array_name}.npy') for array_name in LOADED_ARRAYS})
+    return NaiveBayesModel(version=version, **arrays)
+
+
+class ModelStore:
+    """
+    Process-local handle on the current version of a published model.
+    Loading is lazy; the pointer is re-read at most every
+    POINTER_CHECK_INTERVAL seconds and a changed version is mapped in place
+    of the old one (whose mapping is released once no request uses it).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.root = None
+        self.version = None
+        self.model = None
+        self.checked_at = None
+
+    def get(self):
+        root = artifact_root(self.name)
+        now = time.monotonic()
+        if root != self.root or self.checked_at is None or now - self.checked_at >= POINTER_CHECK_INTERVAL:
+            with self.lock:
+                self.refresh(root, now)
+        return self.model
+
+    def refresh(self, root, now):
+        if root != self.root:
+            self.version, self.model = None, None
+        self.root, self.checked_at = root, now
+        version = current_version(self.name)
+        if version == self.version:
+            return
+        if version is None:
+            self.version, self.model = None, None
+            return
+        try:
+            self.model = load_model(self.name, version)
+        except (OSError, ValueError, ArtifactError):
+            # Keep serving the previous version rather than failing requests
+            logger.exception('Could not load %s version %s', self.name, version)
+        self.version = version
+
+
+categorizer_store = ModelStore(CATEGORIZER)
+
+
+def get_global_model():
+    """The published global categorizer, or None before the first train_categorizer run"""
+    return categorizer_store.get()
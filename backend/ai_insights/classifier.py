@@ -0,0 +1,204 @@
+# backend/ai_insights/classifier.py - HASHED N-GRAM NAIVE BAYES EXPENSE CLASSIFIER
+import re
+import zlib
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+
+from expenses.categories import CATEGORIES
+from expenses.models import Expense
+
+CLASSES = list(CATEGORIES)
+CLASS_INDEX = {slug: index for index, slug in enumerate(CLASSES)}
+
+N_FEATURES = 2 ** 18          # hashed feature space shared by words, bigrams and char trigrams
+ALPHA = 0.1                   # additive smoothing
+USER_WEIGHT = 5.0             # one labelled example of a user's own counts this many global ones
+MIN_GLOBAL_EXAMPLES = 20      # below this the global model is not trained (cold start)
+TRAIN_CHUNK_SIZE = 5000
+
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def _hash(token):
+    return zlib.crc32(token.encode('utf-8')) % N_FEATURES
+
+
+@lru_cache(maxsize=131072)
+def _word_features(word):
+    """Unigram and char trigram hashes of one word; merchant words repeat a lot"""
+    padded = f' {word} '
+    return (_hash(f'w:{word}'),) + tuple(_hash(f'c:{padded[i:i + 3]}') for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=65536)
+def text_features(text):
+    """Hashed word unigrams, word bigrams and in-word char trigrams of `text` (with repeats)"""
+    words = WORD_RE.findall(text.lower())
+    features = [_hash(f'b:{first} {second}') for first, second in zip(words, words[1:])]
+    for word in words:
+        features.extend(_word_features(word))
+    return tuple(features)
+
+
+def expense_text(title, description):
+    return f"{title} {description or ''}"
+
+
+class SparseCounts:
+    """
+    Per-class feature counts over the features actually seen: a sorted array
+    of hashed feature ids (`keys`) and a dense (n_classes, n_keys) `values`
+    matrix, so a batch of features is looked up with a single searchsorted.
+    The arrays may be read-only memory maps (see artifacts.py).
+    """
+
+    def __init__(self, keys, values, class_counts, feature_totals=None):
+        self.keys = keys
+        self.values = values
+        self.class_counts = class_counts
+        self.feature_totals = (
+            np.asarray(values.sum(axis=1, dtype=np.float64)) if feature_totals is None else feature_totals
+        )
+
+    def __bool__(self):
+        return bool(self.class_counts.any())
+
+    @property
+    def n_examples(self):
+        return int(self.class_counts.sum())
+
+    def lookup(self, features):
+        """(n_classes, len(features)) float64 counts for sorted unique `features`"""
+        counts = np.zeros((len(CLASSES), len(features)))
+        if len(self.keys):
+            positions = np.minimum(np.searchsorted(self.keys, features), len(self.keys) - 1)
+            hits = self.keys[positions] == features
+            counts[:, hits] = self.values[:, positions[hits]]
+        return counts
+
+
+class UserDelta(SparseCounts):
+    """
+    A user's own label counts, compiled from their CategorizerCount rows.
+    `feature_totals` ({slug: sum of feature counts}) is required when
+    `feature_counts` only covers some of the user's features.
+    """
+
+    def __init__(self, class_counts, feature_counts, feature_totals=None):
+        class_vector = np.zeros(len(CLASSES))
+        for slug, count in class_counts.items():
+            if slug in CLASS_INDEX:
+                class_vector[CLASS_INDEX[slug]] = count
+
+        per_class = {
+            CLASS_INDEX[slug]: counts for slug, counts in feature_counts.items()
+            if slug in CLASS_INDEX and counts
+        }
+        keys = np.array(sorted({int(key) for counts in per_class.values() for key in counts}), dtype=np.int64)
+        values = np.zeros((len(CLASSES), len(keys)))
+        for index, counts in per_class.items():
+            positions = np.searchsorted(keys, np.fromiter(map(int, counts), dtype=np.int64, count=len(counts)))
+            values[index, positions] = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        totals_vector = None
+        if feature_totals is not None:
+            totals_vector = np.zeros(len(CLASSES))
+            for slug, total in feature_totals.items():
+                if slug in CLASS_INDEX:
+                    totals_vector[CLASS_INDEX[slug]] = total
+        super().__init__(keys, values, class_vector, totals_vector)
+
+
+class NaiveBayesModel(SparseCounts):
+    """Multinomial naive Bayes over hashed text features, blended with per-user counts"""
+
+    def __init__(self, keys, values, class_counts, feature_totals=None, version=None):
+        super().__init__(keys, values, class_counts, feature_totals)
+        self.version = version
+
+    @classmethod
+    def empty(cls):
+        """No global knowledge; predictions rely on the user delta alone"""
+        return cls(np.zeros(0, dtype=np.int64), np.zeros((len(CLASSES), 0), dtype=np.float32), np.zeros(len(CLASSES)))
+
+    @classmethod
+    def train(cls, examples):
+        """Fit from an iterable of (text, category slug) pairs"""
+        feature_counts = np.zeros((len(CLASSES), N_FEATURES), dtype=np.float32)
+        class_counts = np.zeros(len(CLASSES))
+        classes, features = [], []
+
+        def accumulate():
+            if features:
+                np.add.at(feature_counts, (np.asarray(classes), np.asarray(features)), 1)
+                classes.clear()
+                features.clear()
+
+        for text, slug in examples:
+            index = CLASS_INDEX.get(slug)
+            if index is None:
+                continue
+            class_counts[index] += 1
+            item_features = text_features(text)
+            classes.extend([index] * len(item_features))
+            features.extend(item_features)
+            if len(features) >= 1_000_000:
+                accumulate()
+        accumulate()
+
+        # Keep only the hash buckets that were hit
+        keys = np.flatnonzero(feature_counts.any(axis=0)).astype(np.int64)
+        return cls(keys, np.ascontiguousarray(feature_counts[:, keys]), class_counts)
+
+    def predict(self, texts, delta=None):
+        """
+        Score every text in one vectorized pass. Returns (slug, confidence)
+        per text, with slug None when no feature of the text was ever seen.
+        """
+        if not texts:
+            return []
+        feature_lists = [text_features(text) for text in texts]
+        lengths = np.fromiter(map(len, feature_lists), dtype=np.int64, count=len(feature_lists))
+        features = np.fromiter(chain.from_iterable(feature_lists), dtype=np.int64, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        # Score each distinct feature once, then spread back to token positions
+        features, positions = np.unique(features, return_inverse=True)
+
+        counts = self.lookup(features)
+        class_counts = self.class_counts
+        feature_totals = self.feature_totals
+        if delta:
+            counts += USER_WEIGHT * delta.lookup(features)
+            class_counts = class_counts + USER_WEIGHT * delta.class_counts
+            feature_totals = feature_totals + USER_WEIGHT * delta.feature_totals
+
+        known = class_counts > 0
+        if not known.any():
+            return [(None, 0.0)] * len(texts)
+        log_likelihood = np.log(counts + ALPHA) - np.log(feature_totals + ALPHA * N_FEATURES)[:, None]
+        scores = np.empty((len(texts), len(CLASSES)))
+        for index in range(len(CLASSES)):
+            scores[:, index] = np.bincount(rows, weights=log_likelihood[index, positions], minlength=len(texts))
+        with np.errstate(divide='ignore'):
+            scores += np.log(class_counts / class_counts.sum())
+        scores[:, ~known] = -np.inf
+
+        known_features = (counts.sum(axis=0) > 0).astype(np.float64)
+        evidence = np.bincount(rows, weights=known_features[positions], minlength=len(texts))
+        best = scores.argmax(axis=1)
+        # Softmax probability of the winning class
+        confidence = 1.0 / np.exp(scores - scores[np.arange(len(texts)), best][:, None]).sum(axis=1)
+
+        return [
+            (CLASSES[index], round(float(probability), 4)) if seen else (None, 0.0)
+            for index, probability, seen in zip(best, confidence, evidence)
+        ]
+
+
+def labelled_examples(queryset=None):
+    """(text, category) pairs for every expense whose category a user chose"""
+    queryset = Expense.objects.all() if queryset is None else queryset
+    rows = queryset.filter(is_ai_categorized=False).values_list('title', 'description', 'category')
+    for title, description, category in rows.iterator(chunk_size=TRAIN_CHUNK_SIZE):
+        yield expense_text(title, description), category
@@ -0,0 +1,43 @@
+# backend/ai_insights/management/commands/run_ocr_worker.py
+
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from ai_insights.receipts import OCRWorker
+
+class Command(BaseCommand):
+    help = 'Run queued receipt OCR jobs (scan-receipt with async=true) in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='OCR processes to run in parallel (0 runs jobs in this process)'
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue polls when idle')
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=300,
+            help='Seconds after which a running job is assumed abandoned and requeued'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0:
+            raise CommandError('--processes must be 0 or more')
+
+        worker = OCRWorker(
+            processes=options['processes'],
+            poll_interval=options['poll_interval'],
+            stale_after=timedelta(seconds=options['stale_after']),
+        )
+        self.stdout.write(f"Receipt OCR worker started with {options['processes'] or 'inline'} processes")
+        try:
+            processed = worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            processed = worker.processed
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} receipt scan jobs'))
@@ -0,0 +1,31 @@
+# backend/ai_insights/management/commands/train_categorizer.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from ai_insights.artifacts import CATEGORIZER, artifact_root, publish_model
+from ai_insights.classifier import MIN_GLOBAL_EXAMPLES, NaiveBayesModel, labelled_examples
+
+class Command(BaseCommand):
+    help = 'Train the global expense categorizer and publish it as the current model version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=3, help='Number of published versions to keep')
+        parser.add_argument('--min-examples', type=int, default=MIN_GLOBAL_EXAMPLES)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        model = NaiveBayesModel.train(labelled_examples())
+        elapsed = time.perf_counter() - start
+
+        if model.n_examples < options['min_examples']:
+            self.stdout.write(self.style.WARNING(
+                f'Only {model.n_examples} labelled expenses; need {options["min_examples"]}. Nothing published.'
+            ))
+            return
+
+        version = publish_model(model, keep=max(options['keep'], 1), training_seconds=round(elapsed, 2))
+        self.stdout.write(self.style.SUCCESS(
+            f'Published {CATEGORIZER} {version} to {artifact_root(CATEGORIZER)}: '
+            f'{model.n_examples} examples, {len(model.keys)} features, trained in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# CategorizerCount row holding a category's number of labelled examples
+CLASS_FEATURE = -1
+
+
+def split_deltas(apps, schema_editor):
+    CategorizerDelta = apps.get_model('ai_insights', 'CategorizerDelta')
+    CategorizerCount = apps.get_model('ai_insights', 'CategorizerCount')
+
+    def rows():
+        for delta in CategorizerDelta.objects.iterator():
+            for category, count in delta.class_counts.items():
+                yield CategorizerCount(user_id=delta.user_id, category=category, feature=CLASS_FEATURE, count=count)
+            for category, counts in delta.feature_counts.items():
+                for feature, count in counts.items():
+                    yield CategorizerCount(user_id=delta.user_id, category=category, feature=int(feature), count=count)
+
+    CategorizerCount.objects.bulk_create(rows(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ai_insights', '0002_receiptscanjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorizerCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('feature', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categorizer_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'category', 'feature')},
+            },
+        ),
+        migrations.RunPython(split_deltas, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='CategorizerDelta',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:49
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# CategorizerCount row summing a category's feature counts
+TOTAL_FEATURE = -2
+
+
+def add_feature_totals(apps, schema_editor):
+    CategorizerCount = apps.get_model('ai_insights', 'CategorizerCount')
+    totals = (
+        CategorizerCount.objects.filter(feature__gte=0)
+        .values('user_id', 'category').annotate(total=Sum('count')).order_by()
+    )
+    CategorizerCount.objects.bulk_create((
+        CategorizerCount(user_id=row['user_id'], category=row['category'], feature=TOTAL_FEATURE, count=row['total'])
+        for row in totals.iterator()
+    ), batch_size=1000)
+
+
+def remove_feature_totals(apps, schema_editor):
+    apps.get_model('ai_insights', 'CategorizerCount').objects.filter(feature=TOTAL_FEATURE).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_insights', '0003_categorizer_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categorizercount',
+            index=models.Index(fields=['user', 'feature'], name='categorizer_user_feature_idx'),
+        ),
+        migrations.RunPython(add_feature_totals, remove_feature_totals),
+    ]
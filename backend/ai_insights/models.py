@@ -1,3 +1,228 @@
-from django.db import models
+from collections import Counter, defaultdict
 
-# Create your models here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from expenses.cache import bump_data_version
+from .classifier import UserDelta, text_features
+
+
+# feature value of the row counting a category's labelled examples
+CLASS_FEATURE = -1
+# feature value of the row summing a category's feature counts (the likelihood denominator)
+TOTAL_FEATURE = -2
+
+
+class CategorizerCountManager(models.Manager):
+    UPSERT_CHUNK_SIZE = 200
+    LOOKUP_CHUNK_SIZE = 500
+
+    def learn(self, user_id, added=(), removed=()):
+        """
+        Fold labelled examples into a user's counts. `added`/`removed` are
+        (text, category) pairs; only the rows of their features are written,
+        so the cost follows the size of the change, not the user's history.
+        """
+        changes = Counter()
+        for examples, sign in ((removed, -1), (added, 1)):
+            for text, category in examples:
+                features = text_features(text)
+                changes[category, CLASS_FEATURE] += sign
+                changes[category, TOTAL_FEATURE] += sign * len(features)
+                for feature in features:
+                    changes[category, feature] += sign
+        increments = {key: count for key, count in changes.items() if count > 0}
+        decrements = {key: count for key, count in changes.items() if count < 0}
+        if not increments and not decrements:
+            return
+        with transaction.atomic(using=self.db):
+            if increments:
+                self._increment(user_id, increments)
+            if decrements:
+                self._decrement(user_id, decrements)
+        bump_data_version(user_id)
+
+    def _increment(self, user_id, increments):
+        connection = connections[self.db]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            for (category, feature), count in increments.items():
+                self._increment_one(user_id, category, feature, count)
+            return
+
+        # One atomic upsert per chunk: concurrent writers add up instead of overwriting
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        items = list(increments.items())
+        with connection.cursor() as cursor:
+            for start in range(0, len(items), self.UPSERT_CHUNK_SIZE):
+                chunk = items[start:start + self.UPSERT_CHUNK_SIZE]
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, category, feature, count) '
+                    f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(chunk))} '
+                    f'ON CONFLICT (user_id, category, feature) DO UPDATE SET count = {table}.count + excluded.count',
+                    [value for (category, feature), count in chunk for value in (user_id, category, feature, count)]
+                )
+
+    def _increment_one(self, user_id, category, feature, count):
+        lookup = self.filter(user_id=user_id, category=category, feature=feature)
+        if not lookup.update(count=F('count') + count):
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(user_id=user_id, category=category, feature=feature, count=count)
+            except IntegrityError:
+                # Another writer created the row first
+                lookup.update(count=F('count') + count)
+
+    def _decrement(self, user_id, decrements):
+        # Only existing rows are updated, so forgetting labels never creates
+        # rows (e.g. during a user cascade delete)
+        groups = defaultdict(list)
+        for (category, feature), count in decrements.items():
+            groups[category, count].append(feature)
+        for (category, count), features in groups.items():
+            self.filter(user_id=user_id, category=category, feature__in=features).update(count=F('count') + count)
+
+        by_category = defaultdict(list)
+        for category, feature in decrements:
+            by_category[category].append(feature)
+        for category, features in by_category.items():
+            self.filter(user_id=user_id, category=category, feature__in=features, count__lte=0).delete()
+
+    def compile(self, user_id, features=None):
+        """
+        UserDelta built from a user's rows. With `features`, only the rows of
+        those features (plus the per-category totals) are read, which is all
+        scoring texts with those features needs.
+        """
+        rows = self.filter(user_id=user_id)
+        if features is None:
+            values = list(rows.values_list('category', 'feature', 'count'))
+        else:
+            wanted = sorted({CLASS_FEATURE, TOTAL_FEATURE, *features})
+            values = []
+            for start in range(0, len(wanted), self.LOOKUP_CHUNK_SIZE):
+                chunk = wanted[start:start + self.LOOKUP_CHUNK_SIZE]
+                values.extend(rows.filter(feature__in=chunk).values_list('category', 'feature', 'count'))
+
+        class_counts, feature_counts, feature_totals = {}, {}, {}
+        for category, feature, count in values:
+            if feature == CLASS_FEATURE:
+                class_counts[category] = count
+            elif feature == TOTAL_FEATURE:
+                feature_totals[category] = count
+            else:
+                feature_counts.setdefault(category, {})[feature] = count
+        return UserDelta(class_counts, feature_counts, feature_totals)
+
+    def for_texts(self, user, texts):
+        """UserDelta of `user` covering the features of `texts` (empty for anonymous users or no labels)"""
+        if user is None or not getattr(user, 'is_authenticated', False):
+            return UserDelta({}, {})
+        return self.compile(user.pk, {feature for text in texts for feature in text_features(text)})
+
+    def class_counts(self, user_id):
+        """{category: number of labelled examples} for a user"""
+        return dict(self.filter(user_id=user_id, feature=CLASS_FEATURE).values_list('category', 'count'))
+
+
+class CategorizerCount(models.Model):
+    """
+    One of a user's label counts, blended with the global categorizer model:
+    the examples labelled `category` (feature == CLASS_FEATURE), the
+    occurrences of a hashed text feature among them, or the sum of those
+    occurrences (feature == TOTAL_FEATURE)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categorizer_counts')
+    category = models.CharField(max_length=50)
+    feature = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = CategorizerCountManager()
+
+    class Meta:
+        unique_together = ['user', 'category', 'feature']
+        indexes = [
+            # Scoring looks up the rows of a batch's features across all categories
+            models.Index(fields=['user', 'feature'], name='categorizer_user_feature_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.category} - {self.feature}: {self.count}"
+
+
+class ReceiptScanJobManager(models.Manager):
+    def claim(self, job_id):
+        """Atomically move a pending job to running; False if another worker got it first"""
+        return bool(self.filter(pk=job_id, status=ReceiptScanJob.PENDING).update(
+            status=ReceiptScanJob.RUNNING,
+            started_at=timezone.now(),
+            attempts=models.F('attempts') + 1,
+        ))
+
+    def claim_next(self, limit):
+        """Claim up to `limit` of the oldest pending jobs"""
+        claimed = []
+        candidates = self.filter(status=ReceiptScanJob.PENDING).order_by('created_at', 'id')
+        for job_id in candidates.values_list('id', flat=True)[:limit * 2]:
+            if len(claimed) == limit:
+                break
+            if self.claim(job_id):
+                claimed.append(job_id)
+        return list(self.select_related('user').filter(pk__in=claimed).order_by('created_at', 'id'))
+
+    def requeue_stale(self, older_than):
+        """Put jobs left running by a crashed worker back in the queue (or give up on them)"""
+        stale = self.filter(status=ReceiptScanJob.RUNNING, started_at__lt=timezone.now() - older_than)
+        stale.filter(attempts__gte=ReceiptScanJob.MAX_ATTEMPTS).update(
+            status=ReceiptScanJob.FAILED, error='OCR did not finish', finished_at=timezone.now()
+        )
+        return stale.update(status=ReceiptScanJob.PENDING)
+
+
+class ReceiptScanJob(models.Model):
+    """A receipt image queued for OCR by the run_ocr_worker command"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    MAX_ATTEMPTS = 3
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='receipt_scan_jobs')
+    image = models.FileField(upload_to='receipt_scans/%Y/%m/')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Same payload the synchronous scan-receipt endpoint returns
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    objects = ReceiptScanJobManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Worker queue: oldest pending jobs first
+            models.Index(fields=['status', 'created_at'], name='receipt_scan_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Receipt scan {self.pk} ({self.status}) for {self.user}"
+
+    def finish(self, status, result=None, error=''):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = timezone.now()
+        # The upload is only needed until OCR has run
+        self.image.delete(save=False)
+        self.image = ''
+        self.save(update_fields=['status', 'result', 'error', 'finished_at', 'image'])
@@ -0,0 +1,161 @@
+# backend/ai_insights/receipts.py - RECEIPT SCAN RESULTS AND THE DB-BACKED OCR JOB WORKER
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+
+from .ml_service import ExpenseCategorizer, ReceiptOCR
+from .models import ReceiptScanJob
+
+logger = logging.getLogger(__name__)
+
+
+def scan_result(ocr_result, user):
+    """
+    Turn ReceiptOCR output into the scan-receipt response body.
+    Returns (payload, ok); the synchronous endpoint and the job worker share it.
+    """
+    if not ocr_result['success']:
+        return {
+            'error': 'Failed to process receipt image',
+            'details': ocr_result.get('error', '')
+        }, False
+
+    # Auto-categorize based on merchant name
+    try:
+        category = ExpenseCategorizer.categorize_expense(
+            ocr_result['merchant'],
+            ocr_result['raw_text'],
+            user=user
+        )
+    except Exception:
+        category = 'other'
+
+    return {
+        'amount': ocr_result['amount'],
+        'merchant': ocr_result['merchant'],
+        'suggested_category': ExpenseCategorizer.category_payload(category),
+        'raw_text': ocr_result['raw_text'],
+        'cached': ocr_result.get('cached', False),
+        'timings': ocr_result.get('timings', {})
+    }, True
+
+
+class OCRWorker:
+    """
+    Drain the ReceiptScanJob queue with a bounded process pool. Jobs are
+    claimed with a conditional UPDATE, so any number of workers (on any
+    number of hosts sharing the database) can run side by side.
+    """
+
+    def __init__(self, processes, poll_interval=1.0, stale_after=timedelta(minutes=5)):
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.processed = 0
+
+    def run(self, once=False):
+        """Process jobs until interrupted (or, with `once`, until the queue is empty)"""
+        requeued = ReceiptScanJob.objects.requeue_stale(self.stale_after)
+        if requeued:
+            logger.warning('Requeued %d stale receipt scan jobs', requeued)
+
+        if self.processes == 0:
+            return self.run_inline(once)
+
+        while True:
+            try:
+                return self.run_pool(once)
+            except BrokenProcessPool:
+                # An OCR process died (e.g. OOM-killed); start a fresh pool
+                logger.exception('OCR process pool broke; restarting it')
+
+    def run_inline(self, once):
+        while True:
+            jobs = ReceiptScanJob.objects.claim_next(1)
+            if not jobs:
+                if once:
+                    return self.processed
+                time.sleep(self.poll_interval)
+                continue
+            job = jobs[0]
+            try:
+                ocr_result = ReceiptOCR.extract_expense_data(job.image.path)
+            except Exception as e:
+                self.retry_or_fail(job, e)
+                continue
+            self.complete(job, ocr_result)
+
+    def make_pool(self):
+        # Spawned rather than forked: processes start lazily at the first
+        # submit, after claim_next() has opened a DB connection, and a fork
+        # would hand them the parent's socket. Django is set up before a
+        # process unpickles its first job, which imports models.
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+
+    def run_pool(self, once):
+        running = {}
+        try:
+            with self.make_pool() as pool:
+                while True:
+                    while len(running) < self.processes:
+                        jobs = ReceiptScanJob.objects.claim_next(self.processes - len(running))
+                        if not jobs:
+                            break
+                        for job in jobs:
+                            # Re-scans of an image this worker has already read skip the pool
+                            digest, cached = ReceiptOCR.lookup_cached(job.image.path)
+                            if cached is not None:
+                                self.complete(job, {**cached, 'cached': True})
+                                continue
+                            future = pool.submit(ReceiptOCR.extract_expense_data, job.image.path)
+                            running[future] = (job, digest)
+                    if not running:
+                        if once:
+                            return self.processed
+                        time.sleep(self.poll_interval)
+                        continue
+
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, digest = running.pop(future)
+                        try:
+                            ocr_result = future.result()
+                        except BrokenProcessPool:
+                            running[future] = (job, digest)
+                            raise
+                        except Exception as e:
+                            self.retry_or_fail(job, e)
+                            continue
+                        ReceiptOCR.cache.put(digest, ocr_result)
+                        self.complete(job, ocr_result)
+        finally:
+            # Hand unfinished jobs back to the queue on shutdown or pool failure
+            if running:
+                ReceiptScanJob.objects.filter(
+                    pk__in=[job.pk for job, _ in running.values()], status=ReceiptScanJob.RUNNING
+                ).update(status=ReceiptScanJob.PENDING)
+
+    def complete(self, job, ocr_result):
+        payload, ok = scan_result(ocr_result, job.user)
+        if ok:
+            job.finish(ReceiptScanJob.DONE, result=payload)
+        else:
+            job.finish(ReceiptScanJob.FAILED, result=payload, error=payload['details'] or payload['error'])
+        self.processed += 1
+
+    def retry_or_fail(self, job, error):
+        logger.exception('Receipt scan job %s failed', job.pk, exc_info=error)
+        if job.attempts < ReceiptScanJob.MAX_ATTEMPTS:
+            ReceiptScanJob.objects.filter(pk=job.pk).update(status=ReceiptScanJob.PENDING)
+        else:
+            job.finish(ReceiptScanJob.FAILED, error=str(error))
+            self.processed += 1
@@ -0,0 +1,41 @@
+# backend/ai_insights/signals.py - LEARN PER-USER CATEGORY LABELS AS EXPENSES CHANGE
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from expenses.models import Expense
+from .classifier import expense_text
+from .models import CategorizerCount
+
+
+def _examples(state):
+    if state is None:
+        return ()
+    title, description, category = state
+    return ((expense_text(title, description), category),)
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_label_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, '_label_state'):
+        return
+    previous = Expense.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._label_state = previous.label_state()
+
+
+@receiver(post_save, sender=Expense)
+def learn_label_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_label_state', None)
+    new = instance.label_state()
+    if old != new:
+        CategorizerCount.objects.learn(instance.user_id, added=_examples(new), removed=_examples(old))
+    instance._label_state = new
+
+
+@receiver(post_delete, sender=Expense)
+def forget_label_on_delete(sender, instance, **kwargs):
+    old = instance._label_state if hasattr(instance, '_label_state') else instance.label_state()
+    CategorizerCount.objects.learn(instance.user_id, removed=_examples(old))
+    instance.__dict__.pop('_label_state', None)
@@ -1,3 +1,532 @@
-from django.test import TestCase
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from PIL import Image, ImageDraw
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from expenses.models import Expense
+from . import artifacts, classifier
+from .classifier import NaiveBayesModel, UserDelta
+from .ml_service import ExpenseCategorizer, ReceiptOCR, SpendingAnalyzer, pdf_page_pool
+from .models import CategorizerCount, ReceiptScanJob
+from .receipts import OCRWorker
+
+
+class SpendingAnalyzerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='carol', password='pass12345')
+
+    def add_expense(self, amount, category, day):
+        return Expense.objects.create(
+            user=self.user, title='Expense', amount=Decimal(amount),
+            category=category, date=day,
+        )
+
+    def test_insights_compare_months_and_name_top_category(self):
+        this_month = timezone.localdate().replace(day=1)
+        last_month = date(this_month.year - (this_month.month == 1), (this_month.month - 2) % 12 + 1, 1)
+        self.add_expense('500.00', 'shopping', this_month)
+        self.add_expense('200.00', 'groceries', last_month)
+
+        insights = SpendingAnalyzer.get_spending_insights(self.user)
+
+        titles = {insight['title']: insight for insight in insights}
+        self.assertIn('High Spending Alert', titles)
+        self.assertEqual(titles['Top Spending Category']['message'], 'You spend most on Shopping')
+
+    def test_all_rules_share_two_queries(self):
+        today = timezone.localdate()
+        for amount in ('20.00', '30.00', '45.00', '900.00'):
+            self.add_expense(amount, 'food', today)
+        extra_rule = mock.Mock(return_value={'type': 'info', 'title': 'Extra', 'message': '', 'value': 0})
+
+        with mock.patch.object(SpendingAnalyzer, 'INSIGHT_EVALUATORS', SpendingAnalyzer.INSIGHT_EVALUATORS + [extra_rule]):
+            with self.assertNumQueries(2):
+                insights = SpendingAnalyzer.get_spending_insights(self.user)
+
+        snapshot = extra_rule.call_args[0][0]
+        self.assertEqual((snapshot['small_transaction_count'], snapshot['transaction_count']), (3, 4))
+        self.assertEqual(snapshot['current_month_total'], 995.0)
+        self.assertEqual(
+            [insight['title'] for insight in insights],
+            ['Top Spending Category', 'Small Transaction Pattern', 'Extra']
+        )
+
+    def test_recommendations_use_category_totals(self):
+        self.add_expense('300.00', 'travel', timezone.localdate())
+
+        recommendations = SpendingAnalyzer.get_budget_recommendations(self.user)
+
+        self.assertEqual(recommendations[0]['category'], 'Travel')
+        self.assertEqual(recommendations[0]['recommended_amount'], 330.0)
+
+
+class ArtifactDirMixin:
+    """Give each test its own, initially empty, ML_ARTIFACT_DIR"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.artifact_dir = directory.name
+        override = self.settings(ML_ARTIFACT_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        artifacts.categorizer_store.reset()
+        self.addCleanup(artifacts.categorizer_store.reset)
+
+
+class ExpenseCategorizerTests(ArtifactDirMixin, TestCase):
+    # No published model: keyword rules are the cold-start fallback
+
+    def test_returns_category_slugs_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(ExpenseCategorizer.categorize_expense('Uber to airport'), 'transportation')
+            self.assertEqual(ExpenseCategorizer.categorize_expense('Dinner', 'at a restaurant'), 'food_dining')
+            self.assertEqual(ExpenseCategorizer.categorize_expense('Misc'), 'other')
+
+    def test_keywords_match_whole_words_only(self):
+        # 'vegas' contains 'gas', 'business' contains 'bus'
+        self.assertIsNone(ExpenseCategorizer.best_category('Vegas business trip'))
+        self.assertEqual(ExpenseCategorizer.categorize_expense('Gas bill'), 'utilities')
+
+    def test_plural_keywords_match(self):
+        self.assertEqual(ExpenseCategorizer.categorize_expense('Movies with friends'), 'entertainment')
+        self.assertEqual(ExpenseCategorizer.categorize_expense('Medicines'), 'healthcare')
+
+    def test_batch_keeps_order_and_reports_confidence(self):
+        results = ExpenseCategorizer.categorize_batch([
+            ('Uber ride', ''), ('Misc', None), ('Uber ride', ''), ('Netflix', 'movie night'),
+        ])
+
+        self.assertEqual(results, [
+            ('transportation', 1.0), ('other', 0.0), ('transportation', 1.0), ('entertainment', 1.0),
+        ])
+        # 'mobile' is both a shopping and a utilities keyword
+        self.assertEqual(ExpenseCategorizer.categorize_with_confidence('Mobile recharge'), ('utilities', 0.6667))
+
+
+class NaiveBayesModelTests(TestCase):
+    def test_batch_prediction_in_order_with_unknown_texts_unlabelled(self):
+        model = NaiveBayesModel.train([
+            ('BigBasket weekly order', 'groceries'),
+            ('DMart vegetables', 'groceries'),
+            ('Cult fitness membership', 'fitness'),
+            ('Gym protein shake', 'fitness'),
+        ])
+
+        predictions = model.predict(['bigbasket fruits', 'zzz', 'gym membership'])
+
+        self.assertEqual([category for category, _ in predictions], ['groceries', None, 'fitness'])
+        self.assertGreater(predictions[0][1], 0.5)
+        self.assertEqual(predictions[1], (None, 0.0))
+
+    def test_user_delta_outweighs_global_counts(self):
+        model = NaiveBayesModel.train([('Starbucks coffee', 'food_dining')] * 3)
+        features = Counter(classifier.text_features('starbucks coffee'))
+        delta = UserDelta({'bills_subscriptions': 1}, {'bills_subscriptions': features})
+
+        self.assertEqual(model.predict(['starbucks'])[0][0], 'food_dining')
+        self.assertEqual(model.predict(['starbucks'], delta)[0][0], 'bills_subscriptions')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CategorizerLearningTests(ArtifactDirMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='erin', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def add_expense(self, title, category, user=None, **fields):
+        return Expense.objects.create(
+            user=user or self.user, title=title, amount=Decimal('10.00'),
+            category=category, date=timezone.localdate(), **fields
+        )
+
+    def test_user_labels_are_learned_on_save_and_forgotten_on_delete(self):
+        expense = self.add_expense('Zepto order', 'groceries')
+
+        self.assertEqual(ExpenseCategorizer.categorize_expense('zepto', user=self.user), 'groceries')
+        # Other users only have the keyword fallback
+        self.assertEqual(ExpenseCategorizer.categorize_expense('zepto'), 'other')
+
+        expense.delete()
+        self.assertEqual(CategorizerCount.objects.class_counts(self.user.pk), {})
+        self.assertFalse(CategorizerCount.objects.filter(user=self.user).exists())
+
+    def test_correcting_a_suggestion_teaches_the_model(self):
+        expense = self.add_expense('Swiggy Instamart', 'food_dining', is_ai_categorized=True)
+        self.assertFalse(CategorizerCount.objects.filter(user=self.user).exists())
+
+        response = self.client.patch(
+            f'/api/expenses/expenses/{expense.id}/', {'category': 'groceries'}, format='json'
+        )
+
+        self.assertFalse(response.data['is_ai_categorized'])
+        self.assertEqual(CategorizerCount.objects.class_counts(self.user.pk), {'groceries': 1})
+        self.assertEqual(ExpenseCategorizer.categorize_expense('instamart', user=self.user), 'groceries')
+
+    def test_learning_cost_does_not_grow_with_label_history(self):
+        self.add_expense('Zepto order', 'groceries')
+        with CaptureQueriesContext(connection) as first:
+            self.add_expense('Uber ride', 'transportation')
+        for index in range(30):
+            self.add_expense(f'Merchant {index} purchase', 'shopping')
+        with CaptureQueriesContext(connection) as later:
+            self.add_expense('Ola ride', 'transportation')
+
+        def categorizer_queries(context):
+            return [query for query in context.captured_queries if 'categorizercount' in query['sql']]
+
+        # One upsert per label, however many rows the user already has
+        self.assertEqual(len(categorizer_queries(later)), 1)
+        self.assertEqual(len(categorizer_queries(first)), 1)
+        self.assertEqual(CategorizerCount.objects.class_counts(self.user.pk)['transportation'], 2)
+
+    def test_scoring_cost_does_not_grow_with_label_history(self):
+        self.add_expense('Zepto order', 'groceries')
+        with CaptureQueriesContext(connection) as first:
+            small = CategorizerCount.objects.for_texts(self.user, ['zepto'])
+        for index in range(30):
+            self.add_expense(f'Merchant {index} purchase', 'shopping')
+        with CaptureQueriesContext(connection) as later:
+            large = CategorizerCount.objects.for_texts(self.user, ['zepto'])
+
+        self.assertEqual(len(later.captured_queries), len(first.captured_queries))
+        # Only the rows of the text's features are read, not the new shopping ones
+        self.assertEqual(len(large.keys), len(small.keys))
+        self.assertEqual(large.n_examples, 31)
+
+    def test_partial_delta_scores_like_the_full_table(self):
+        for title, category in [('Zepto order', 'groceries'), ('Zepto cafe latte', 'food_dining'),
+                                ('Cafe coffee day', 'food_dining'), ('Uber ride', 'transportation')]:
+            self.add_expense(title, category)
+        texts = ['zepto cafe', 'uber', 'coffee order']
+        model = NaiveBayesModel.empty()
+
+        self.assertEqual(
+            model.predict(texts, CategorizerCount.objects.for_texts(self.user, texts)),
+            model.predict(texts, CategorizerCount.objects.compile(self.user.pk)),
+        )
+
+    def test_global_model_learns_from_all_labelled_expenses(self):
+        other = User.objects.create_user(username='frank', password='pass12345')
+        for _ in range(classifier.MIN_GLOBAL_EXAMPLES):
+            self.add_expense('Decathlon running shoes', 'fitness', user=other)
+        self.add_expense('Decathlon', 'shopping', user=other, is_ai_categorized=True)
+        call_command('train_categorizer', stdout=StringIO())
+
+        category, confidence = ExpenseCategorizer.categorize_with_confidence('decathlon', user=self.user)
+
+        self.assertEqual(category, 'fitness')
+        self.assertGreater(confidence, 0.9)
+
+
+class ModelArtifactTests(ArtifactDirMixin, TestCase):
+    def train(self, *examples):
+        return NaiveBayesModel.train(examples)
+
+    def test_published_version_is_memory_mapped_and_predicts_the_same(self):
+        model = self.train(('Zepto groceries', 'groceries'), ('PVR movie', 'entertainment'))
+
+        version = artifacts.publish_model(model)
+        loaded = artifacts.get_global_model()
+
+        self.assertEqual(artifacts.current_version(), version)
+        self.assertEqual(loaded.version, version)
+        self.assertIsInstance(loaded.values, np.memmap)
+        self.assertEqual(loaded.predict(['zepto', 'pvr']), model.predict(['zepto', 'pvr']))
+
+    def test_workers_pick_up_a_new_version_when_the_pointer_changes(self):
+        artifacts.publish_model(self.train(('Zepto', 'groceries')))
+        self.assertEqual(artifacts.get_global_model().predict(['zepto'])[0][0], 'groceries')
+
+        newer = artifacts.publish_model(self.train(('Zepto', 'food_dining')))
+        # Within the check interval the mapped version keeps serving
+        self.assertEqual(artifacts.get_global_model().predict(['zepto'])[0][0], 'groceries')
+        with mock.patch.object(artifacts, 'POINTER_CHECK_INTERVAL', 0):
+            self.assertEqual(artifacts.get_global_model().version, newer)
+            self.assertEqual(artifacts.get_global_model().predict(['zepto'])[0][0], 'food_dining')
+
+    def test_old_versions_are_pruned(self):
+        versions = [artifacts.publish_model(self.train(('Zepto', 'groceries')), keep=2) for _ in range(4)]
+
+        remaining = sorted(path.name for path in artifacts.artifact_root(artifacts.CATEGORIZER).iterdir() if path.is_dir())
+        self.assertEqual(remaining, sorted(versions[-2:]))
+
+    def test_train_command_skips_publishing_without_enough_labels(self):
+        out = StringIO()
+        call_command('train_categorizer', stdout=out)
+
+        self.assertIn('Nothing published', out.getvalue())
+        self.assertIsNone(artifacts.current_version())
+        self.assertIsNone(artifacts.get_global_model())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CategorizeEndpointTests(ArtifactDirMixin, APITestCase):
+    url = '/api/ai/categorize/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='dave', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def test_batch_request_returns_results_in_order(self):
+        items = [{'title': 'Pizza'}, {'title': 'Hospital', 'description': 'checkup'}] * 500
+
+        with self.assertNumQueries(1):  # the user's label delta
+            response = self.client.post(self.url, {'items': items}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1000)
+        self.assertEqual(response.data['results'][:2], [
+            {'category': 'food_dining', 'confidence': 1.0},
+            {'category': 'healthcare', 'confidence': 1.0},
+        ])
+        self.assertEqual(set(response.data['categories']), {'food_dining', 'healthcare'})
+        self.assertEqual(response.data['categories']['healthcare']['value'], 'healthcare')
+
+    def test_batch_item_without_title_is_rejected(self):
+        response = self.client.post(self.url, {'items': [{'title': 'Pizza'}, {'description': 'x'}]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'items[1]: Title is required')
+
+    def test_single_request_still_supported(self):
+        response = self.client.post(self.url, {'title': 'Electricity bill'}, format='json')
+
+        self.assertEqual(response.data['suggested_category']['value'], 'utilities')
+        self.assertEqual(response.data['confidence'], 1.0)
+
+
+def fake_ocr(image_path):
+    """Stand-in for tesseract; module level so the worker's process pool can pickle it"""
+    with open(image_path, 'rb') as image:
+        merchant = image.read().decode()
+    return {'amount': 120.0, 'merchant': merchant, 'raw_text': f'{merchant}\nTotal Rs 120.00', 'success': True}
+
+
+def has_open_connection():
+    from django.db import connection
+    return connection.connection is not None
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ReceiptScanJobTests(ArtifactDirMixin, APITestCase):
+    url = '/api/ai/scan-receipt/'
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='gina', password='pass12345')
+        self.client.force_authenticate(self.user)
+        ReceiptOCR.cache.clear()
+        self.addCleanup(ReceiptOCR.cache.clear)
+
+    def submit(self, merchant='Uber'):
+        upload = SimpleUploadedFile('receipt.jpg', merchant.encode(), content_type='image/jpeg')
+        return self.client.post(self.url, {'receipt_image': upload, 'async': 'true'}, format='multipart')
+
+    def run_worker(self, processes=0):
+        call_command('run_ocr_worker', '--once', f'--processes={processes}', stdout=StringIO())
+
+    def test_async_upload_is_queued_and_returns_202(self):
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], ReceiptScanJob.PENDING)
+        self.assertEqual(response['Location'], response.data['status_url'])
+        job = ReceiptScanJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.user, self.user)
+        self.assertTrue(job.image.storage.exists(job.image.name))
+
+    def test_worker_runs_ocr_and_status_returns_result(self):
+        status_url = self.submit().data['status_url']
+
+        with mock.patch.object(ReceiptOCR, 'extract_expense_data', side_effect=fake_ocr):
+            self.run_worker()
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['status'], ReceiptScanJob.DONE)
+        self.assertEqual(response.data['result']['merchant'], 'Uber')
+        self.assertEqual(response.data['result']['suggested_category']['value'], 'transportation')
+        job = ReceiptScanJob.objects.get()
+        self.assertEqual(job.image.name, '')  # upload removed once processed
+
+    def test_unreadable_image_marks_job_failed(self):
+        status_url = self.submit().data['status_url']
+        failure = {'amount': 0.0, 'merchant': '', 'raw_text': '', 'success': False, 'error': 'cannot identify image'}
+
+        with mock.patch.object(ReceiptOCR, 'extract_expense_data', return_value=failure):
+            self.run_worker()
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['status'], ReceiptScanJob.FAILED)
+        self.assertEqual(response.data['error'], 'cannot identify image')
+
+    def test_process_pool_drains_queue(self):
+        urls = [self.submit(merchant).data['status_url'] for merchant in ('Uber', 'Netflix', 'Pharmacy')]
+
+        with mock.patch.object(ReceiptOCR, 'extract_expense_data', fake_ocr):
+            self.run_worker(processes=2)
+
+        merchants = [self.client.get(url).data['result']['merchant'] for url in urls]
+        self.assertEqual(merchants, ['Uber', 'Netflix', 'Pharmacy'])
+
+    def test_pool_processes_do_not_inherit_the_db_connection(self):
+        connection.ensure_connection()
+
+        with OCRWorker(processes=1).make_pool() as pool:
+            self.assertFalse(pool.submit(has_open_connection).result())
+        self.assertTrue(has_open_connection())
+
+    @mock.patch('pytesseract.image_to_string', return_value='Uber\nTotal Rs 120.00')
+    def test_sync_scan_reads_the_upload_directly(self, image_to_string):
+        buffer = BytesIO()
+        Image.new('RGB', (600, 800), 'white').save(buffer, format='PNG')
+        upload = SimpleUploadedFile('receipt.png', buffer.getvalue(), content_type='image/png')
+
+        with mock.patch('tempfile.NamedTemporaryFile') as named_temporary_file:
+            response = self.client.post(self.url, {'receipt_image': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['merchant'], response.data['amount']), ('Uber', 120.0))
+        named_temporary_file.assert_not_called()
+
+    def test_jobs_are_private_to_their_owner(self):
+        status_url = self.submit().data['status_url']
+        self.client.force_authenticate(User.objects.create_user(username='hank', password='pass12345'))
+
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+
+class ReceiptOCRTests(TestCase):
+    def setUp(self):
+        ReceiptOCR.cache.clear()
+        self.addCleanup(ReceiptOCR.cache.clear)
+
+    def photo_bytes(self, size=(4000, 3000), orientation=6):
+        image = Image.new('RGB', size, 'white')
+        ImageDraw.Draw(image).rectangle([400, 400, 1600, 900], fill=(30, 30, 30))
+        exif = Image.Exif()
+        exif[0x0112] = orientation  # rotated 90° as phone cameras store it
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def test_preprocess_orients_downscales_and_binarizes(self):
+        image = ReceiptOCR.preprocess(Image.open(BytesIO(self.photo_bytes())))
+
+        self.assertEqual(image.mode, 'L')
+        self.assertLessEqual(max(image.size), ReceiptOCR.MAX_LONG_SIDE)
+        self.assertGreater(image.height, image.width)  # EXIF rotation applied
+        self.assertEqual({value for _, value in image.getcolors()}, {0, 255})
+
+    @mock.patch('pytesseract.image_to_string', return_value='Cafe Coffee Day\nTotal Rs 250.00')
+    def test_results_are_cached_by_image_content(self, image_to_string):
+        data = self.photo_bytes(size=(800, 600))
+
+        first = ReceiptOCR.extract_expense_data(data)
+        second = ReceiptOCR.extract_expense_data(BytesIO(data))
+
+        self.assertEqual(image_to_string.call_count, 1)
+        self.assertEqual((first['merchant'], first['amount']), ('Cafe Coffee Day', 250.0))
+        self.assertFalse(first['cached'])
+        self.assertEqual(set(first['timings']), {'read_ms', 'preprocess_ms', 'ocr_ms', 'parse_ms', 'total_ms'})
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['raw_text'], first['raw_text'])
+
+    def pdf_bytes(self, pages):
+        """Minimal PDF; each page is a list of text lines, an empty list is a page with no text layer"""
+        objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+        kids = []
+        for lines in pages:
+            stream = 'BT /F1 12 Tf 72 720 Td ' + ' '.join(f'({line}) Tj 0 -16 Td' for line in lines) + ' ET'
+            objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+            objects.append(
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R '
+                '/Resources << /Font << /F1 3 0 R >> >> >>'
+            )
+            kids.append(f'{len(objects)} 0 R')
+        objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+        data = b'%PDF-1.4\n'
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(data))
+            data += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+        xref = len(data)
+        data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+        data += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+        data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+        return data
+
+    @mock.patch('pytesseract.image_to_string')
+    def test_pdf_text_layer_is_read_without_ocr(self, image_to_string):
+        data = self.pdf_bytes([
+            ['Tata Power Delhi', 'Invoice No 4471 for October'],
+            ['Energy charges Rs 1,020.00', 'Total Rs 1,234.50'],
+        ])
+
+        result = ReceiptOCR.extract_expense_data(data)
+
+        image_to_string.assert_not_called()
+        self.assertTrue(result['success'])
+        self.assertEqual((result['merchant'], result['amount']), ('Tata Power Delhi', 1234.5))
+        self.assertEqual((result['pages'], result['ocr_pages']), (2, 0))
+        self.assertIn('text_layer_ms', result['timings'])
+
+    @override_settings(OCR_PDF_PROCESSES=1)
+    @mock.patch('pytesseract.image_to_string', return_value='Total Rs 480.00')
+    def test_scanned_pdf_pages_are_rasterized_and_ocred(self, image_to_string):
+        data = self.pdf_bytes([['Big Bazaar Koramangala', 'Tax invoice for groceries'], [], []])
+
+        result = ReceiptOCR.extract_expense_data(data)
+
+        self.assertEqual(image_to_string.call_count, 2)
+        page = image_to_string.call_args[0][0]
+        self.assertEqual(page.mode, 'L')
+        self.assertLessEqual(max(page.size), ReceiptOCR.PDF_MAX_LONG_SIDE)
+        self.assertEqual((result['merchant'], result['amount']), ('Big Bazaar Koramangala', 480.0))
+        self.assertEqual((result['pages'], result['ocr_pages']), (3, 2))
+        self.assertIn('ocr_ms', result['timings'])
+
+    @override_settings(OCR_PDF_PROCESSES=2)
+    @mock.patch('pytesseract.image_to_string', return_value='Total Rs 480.00')
+    def test_scanned_pdfs_share_one_page_pool(self, image_to_string):
+        data = self.pdf_bytes([[], []])
+        pdf_page_pool.shutdown()
+        self.addCleanup(pdf_page_pool.shutdown)
+
+        # Threads stand in for processes so the patched OCR call is visible here
+        def thread_pool(max_workers, mp_context, initializer):
+            return ThreadPoolExecutor(max_workers)
+
+        with mock.patch('ai_insights.ml_service.ProcessPoolExecutor', side_effect=thread_pool) as executor:
+            for _ in range(3):
+                text, pages, ocr_pages = ReceiptOCR.extract_pdf_text(data, lambda name: None)
+
+        executor.assert_called_once()
+        self.assertEqual(executor.call_args.kwargs['max_workers'], 2)
+        self.assertEqual(executor.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        self.assertEqual(image_to_string.call_count, 6)
+        self.assertEqual((pages, ocr_pages), (2, 2))
+        self.assertIn('480.00', text)
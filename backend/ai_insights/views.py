@@ -4,20 +4,26 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-import tempfile
-import os
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from expenses.cache import cached_for_user, conditional_get, with_cache_status
 from .ml_service import SpendingAnalyzer, ExpenseCategorizer, ReceiptOCR
+from .models import ReceiptScanJob
+from .receipts import scan_result
+
+MAX_CATEGORIZE_BATCH = 20000
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get('spending_insights')
 def spending_insights(request):
     """Get AI-powered spending insights"""
     try:
-        insights = SpendingAnalyzer.get_spending_insights(request.user)
-        return Response({
-            'insights': insights,
+        body, hit = cached_for_user(request.user, 'spending_insights', lambda: {
+            'insights': SpendingAnalyzer.get_spending_insights(request.user),
             'generated_at': timezone.now()
         })
+        return with_cache_status(Response(body), hit)
     except Exception as e:
         return Response({
             'insights': [],
@@ -27,14 +33,15 @@ def spending_insights(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get('budget_recommendations')
 def budget_recommendations(request):
     """Get AI budget recommendations"""
     try:
-        recommendations = SpendingAnalyzer.get_budget_recommendations(request.user)
-        return Response({
-            'recommendations': recommendations,
+        body, hit = cached_for_user(request.user, 'budget_recommendations', lambda: {
+            'recommendations': SpendingAnalyzer.get_budget_recommendations(request.user),
             'generated_at': timezone.now()
         })
+        return with_cache_status(Response(body), hit)
     except Exception as e:
         # Return default recommendations on error
         default_recommendations = [
@@ -57,10 +64,39 @@ def budget_recommendations(request):
             'generated_at': timezone.now()
         })
 
+def categorize_batch(user, items):
+    """Batch mode of categorize_expense: {'items': [{'title', 'description'}, ...]}"""
+    if not isinstance(items, list) or len(items) > MAX_CATEGORIZE_BATCH:
+        return Response({
+            'error': f'items must be a list of at most {MAX_CATEGORIZE_BATCH} objects'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    pairs = []
+    for index, item in enumerate(items):
+        title = item.get('title') if isinstance(item, dict) else None
+        if not title or not isinstance(title, str):
+            return Response({
+                'error': f'items[{index}]: Title is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        pairs.append((title, item.get('description') or ''))
+    
+    results = ExpenseCategorizer.categorize_batch(pairs, user=user)
+    # Category details are sent once per distinct category rather than per item
+    return Response({
+        'results': [{'category': category, 'confidence': confidence} for category, confidence in results],
+        'categories': {
+            category: ExpenseCategorizer.category_payload(category)
+            for category in {category for category, _ in results}
+        }
+    })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def categorize_expense(request):
-    """Auto-categorize expense using AI"""
+    """Auto-categorize expense using AI (a single title, or a batch under 'items')"""
+    if 'items' in request.data:
+        return categorize_batch(request.user, request.data['items'])
+    
     title = request.data.get('title', '')
     description = request.data.get('description', '')
     
@@ -70,31 +106,28 @@ def categorize_expense(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        category = ExpenseCategorizer.categorize_expense(title, description)
+        category, confidence = ExpenseCategorizer.categorize_with_confidence(
+            title, description, user=request.user
+        )
         
         return Response({
-            'suggested_category': {
-                'id': category.id if category else None,
-                'name': category.name if category else 'Other',
-                'icon': category.icon if category else '💰',
-                'color': category.color if category else '#3B82F6'
-            }
+            'suggested_category': ExpenseCategorizer.category_payload(category),
+            'confidence': confidence
         })
     except Exception as e:
         return Response({
-            'suggested_category': {
-                'id': None,
-                'name': 'Other',
-                'icon': '💰',
-                'color': '#3B82F6'
-            },
+            'suggested_category': ExpenseCategorizer.category_payload('other'),
             'error': str(e)
         })
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def scan_receipt(request):
-    """Scan receipt image and extract expense data"""
+    """
+    Scan receipt image and extract expense data. With async=true the image is
+    queued for the run_ocr_worker command and 202 is returned immediately;
+    poll the returned status_url for the result.
+    """
     if 'receipt_image' not in request.FILES:
         return Response({
             'error': 'Receipt image is required'
@@ -102,50 +135,41 @@ def scan_receipt(request):
     
     receipt_image = request.FILES['receipt_image']
     
-    # Save image temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-        for chunk in receipt_image.chunks():
-            tmp_file.write(chunk)
-        tmp_file_path = tmp_file.name
+    run_async = str(request.data.get('async', request.query_params.get('async', ''))).lower()
+    if run_async in ('1', 'true', 'yes'):
+        job = ReceiptScanJob.objects.create(user=request.user, image=receipt_image)
+        return Response(
+            receipt_scan_job_payload(job),
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('receipt_scan_status', args=[job.pk])}
+        )
     
     try:
-        # Extract data using OCR
-        ocr_result = ReceiptOCR.extract_expense_data(tmp_file_path)
-        
-        if ocr_result['success']:
-            # Auto-categorize based on merchant name
-            try:
-                category = ExpenseCategorizer.categorize_expense(
-                    ocr_result['merchant'], 
-                    ocr_result['raw_text']
-                )
-            except:
-                category = None
-            
-            return Response({
-                'amount': ocr_result['amount'],
-                'merchant': ocr_result['merchant'],
-                'suggested_category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Other',
-                    'icon': category.icon if category else '💰',
-                    'color': category.color if category else '#3B82F6'
-                },
-                'raw_text': ocr_result['raw_text']
-            })
-        else:
-            return Response({
-                'error': 'Failed to process receipt image',
-                'details': ocr_result.get('error', '')
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # OCR straight from the upload (in memory, or already spooled to disk by Django)
+        ocr_result = ReceiptOCR.extract_expense_data(receipt_image)
+        payload, ok = scan_result(ocr_result, request.user)
+        return Response(payload, status=status.HTTP_200_OK if ok else status.HTTP_400_BAD_REQUEST)
     
     except Exception as e:
         return Response({
             'error': 'Failed to process receipt',
             'details': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    finally:
-        # Clean up temporary file
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
\ No newline at end of file
+
+def receipt_scan_job_payload(job):
+    return {
+        'job_id': job.pk,
+        'status': job.status,
+        'status_url': reverse('receipt_scan_status', args=[job.pk]),
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+        'result': job.result,
+        'error': job.error
+    }
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def receipt_scan_status(request, job_id):
+    """Status of an async receipt scan; `result` is filled in once it is done"""
+    job = get_object_or_404(ReceiptScanJob, pk=job_id, user=request.user)
+    return Response(receipt_scan_job_payload(job))
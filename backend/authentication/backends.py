@@ -0,0 +1,132 @@
+# backend/authentication/backends.py - TOKEN AUTHENTICATION WITHOUT A QUERY PER REQUEST
+"""
+CachedTokenAuthentication is a drop-in replacement for DRF's
+TokenAuthentication. A resolved token is kept in the default cache for
+settings.AUTH_TOKEN_CACHE['SHARED_TTL'] seconds, so it only hits the
+database when the cache does not know it. An entry holds nothing but the
+user's id and active flag; the rest of the user (never the password hash)
+is loaded from the database if and when a view reads it (see TokenUser).
+
+Entries are keyed by a SHA-256 digest of the token, never the token
+itself. Deleting a token (logout) or saving a user (e.g. deactivation)
+deletes the shared entry, which revokes it for every worker at once as
+long as CACHE_URL names a cache they all use; without one, every request
+is checked against the database.
+
+An in-process LRU can be put in front with 'TTL' > 0. Other processes'
+copies cannot be reached on revocation and stay valid until they age
+out, so it is only safe with a single worker process.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import TokenUser
+
+DEFAULTS = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 0,           # seconds an in-process entry is trusted; single-process deployments only
+    'SHARED': True,     # keep entries in the default cache, where revocation reaches every worker
+    'SHARED_TTL': 300,
+}
+KEY_PREFIX = 'auth:token:v2'  # entries are (user id, is_active)
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_TOKEN_CACHE', {})}
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class TokenLRU:
+    """In-process LRU of resolved tokens whose entries expire after a TTL"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(digest, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest, value, ttl, max_entries):
+        with self.lock:
+            self.entries[digest] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self.lock:
+            self.entries.pop(digest, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+token_cache = TokenLRU()
+
+
+def invalidate_token(key):
+    """Forget a token everywhere this process can reach, now and after commit"""
+    digest = token_digest(key)
+
+    def forget():
+        token_cache.discard(digest)
+        if cache_settings()['SHARED']:
+            cache.delete(f'{KEY_PREFIX}:{digest}')
+
+    forget()
+    # A request that read the token before the delete committed may have cached it again
+    transaction.on_commit(forget)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that resolves repeat tokens from memory instead of the database"""
+
+    def authenticate_credentials(self, key):
+        options = cache_settings()
+        digest = token_digest(key)
+
+        cached = token_cache.get(digest) if options['TTL'] > 0 else None
+        if cached is None and options['SHARED']:
+            cached = cache.get(f'{KEY_PREFIX}:{digest}')
+            if cached is not None and options['TTL'] > 0:
+                token_cache.put(digest, cached, options['TTL'], options['MAX_ENTRIES'])
+
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cached = (user.pk, user.is_active)
+            if options['TTL'] > 0:
+                token_cache.put(digest, cached, options['TTL'], options['MAX_ENTRIES'])
+            if options['SHARED']:
+                cache.set(f'{KEY_PREFIX}:{digest}', cached, timeout=options['SHARED_TTL'])
+            return user, token
+
+        user_id, is_active = cached
+        if not is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        # Fresh instances per request, so per-request state never leaks between threads
+        user = TokenUser.from_db(DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, is_active])
+        return user, Token(key=key, user=user)
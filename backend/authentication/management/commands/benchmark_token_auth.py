@@ -0,0 +1,69 @@
+# backend/authentication/management/commands/benchmark_token_auth.py
+
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import api_view, authentication_classes
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from authentication.backends import CachedTokenAuthentication, token_cache
+
+
+def whoami(request):
+    """Trivial authenticated view, so authentication is the only database work"""
+    return Response({'id': request.user.pk})
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request queries and latency of TokenAuthentication and CachedTokenAuthentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], DummyCache):
+            self.stderr.write(self.style.WARNING(
+                'No cache is configured (CACHE_URL), so the token cache is off in this deployment; '
+                'benchmarking against a local-memory cache instead'
+            ))
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+                return self.benchmark(options)
+        return self.benchmark(options)
+
+    def benchmark(self, options):
+        # The benchmark user and token are rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+            token = Token.objects.create(user=user)
+            for label, backend in (
+                ('TokenAuthentication', TokenAuthentication),
+                ('CachedTokenAuthentication', CachedTokenAuthentication),
+            ):
+                self.run(label, backend, token.key, options['requests'])
+            transaction.set_rollback(True)
+
+    def run(self, label, backend, key, requests):
+        view = api_view(['GET'])(authentication_classes([backend])(whoami))
+        factory = APIRequestFactory()
+        token_cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(requests):
+                response = view(factory.get('/whoami/', HTTP_AUTHORIZATION=f'Token {key}'))
+                assert response.status_code == 200, response.data
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{label:>26}: {len(queries) / requests:5.2f} queries per request, '
+            f'{elapsed / requests * 1e6:7.1f} µs per request over {requests} requests'
+        )
@@ -1,3 +1,19 @@
-from django.db import models
+# backend/authentication/models.py
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class TokenUser(User):
+    """
+    The user of a cached token (see backends.py): built with only id and
+    is_active loaded, so requests that just filter by the user need no
+    query. The first other field read loads all of the rest at once.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
@@ -0,0 +1,23 @@
+# backend/authentication/signals.py - DROP CACHED TOKENS WHEN THEY STOP BEING VALID
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .backends import invalidate_token
+from .models import TokenUser
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)  # request.user of a cached token
+def forget_tokens_of_changed_user(sender, instance, created, raw=False, **kwargs):
+    """Deactivation (or any other change to the user) must not be served from a stale cached copy"""
+    if created or raw:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
@@ -1,3 +1,76 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .backends import KEY_PREFIX, CachedTokenAuthentication, token_cache, token_digest
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    # Stands in for the CACHE_URL every worker shares; a test run is a single process
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username='grace', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def shared_entry(self):
+        return cache.get(f'{KEY_PREFIX}:{token_digest(self.token.key)}')
+
+    def test_repeat_requests_authenticate_from_the_shared_cache(self):
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+
+        with self.assertNumQueries(0):
+            user, token = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+        self.assertEqual((user.pk, token.key, token.user_id), (self.user.pk, self.token.key, self.user.pk))
+        self.assertEqual(len(token_cache.entries), 0)
+
+    def test_user_fields_are_loaded_on_first_use_only(self):
+        self.client.get('/api/auth/profile/')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/profile/')
+
+        self.assertEqual(response.data['username'], 'grace')
+
+    def test_shared_entry_holds_no_user_data(self):
+        self.client.get('/api/auth/profile/')
+
+        self.assertEqual(self.shared_entry(), (self.user.pk, True))
+
+    @override_settings(AUTH_TOKEN_CACHE={'TTL': 60, 'SHARED': False})
+    def test_opt_in_local_tier(self):
+        self.client.get('/api/auth/profile/')
+
+        with self.assertNumQueries(0):
+            user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(len(token_cache.entries), 1)
+        self.assertIsNone(self.shared_entry())
+
+    def test_logout_revokes_the_shared_entry(self):
+        self.client.get('/api/auth/profile/')
+        self.assertIsNotNone(self.shared_entry())
+
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+
+        # Other workers only know the token through the shared entry
+        self.assertIsNone(self.shared_entry())
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_deactivated_user_is_rejected_immediately(self):
+        self.client.get('/api/auth/profile/')
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(self.shared_entry())
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
@@ -5,3 +5,4 @@ apt-get install -y tesseract-ocr tesseract-ocr-eng libtesseract-dev
 pip install -r requirements.txt
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py train_categorizer
@@ -0,0 +1,37 @@
+# backend/expense_tracker/parsers.py - ORJSON PARSER FOR THE REST API
+"""
+ORJSONParser is a drop-in for DRF's JSONParser. UTF-8 bodies are decoded
+with orjson; other charsets, STRICT_JSON=False, bodies orjson rejects and
+bodies with 19+ digit runs (orjson reads integers wider than 64 bits as
+floats) go through JSONParser, so accepted input, parsed values and error
+messages stay the same.
+"""
+import codecs
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+# Digits -> '0', everything else -> ' ', so a 19+ digit run is a plain substring
+DIGIT_RUNS = bytes(ord('0') if ord('0') <= c <= ord('9') else ord(' ') for c in range(256))
+LONG_NUMBER = b'0' * 19
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_NUMBER in body.translate(DIGIT_RUNS):
+            return super().parse(BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,53 @@
+# backend/expense_tracker/renderers.py - ORJSON RENDERER FOR THE REST API
+"""
+ORJSONRenderer is a drop-in for DRF's JSONRenderer that encodes with
+orjson. Types orjson does not know (Decimal, lazy translation strings,
+timedelta, QuerySets, ...) go through DRF's own JSONEncoder.default, and
+datetimes with a zero UTC offset end in 'Z' as DRF writes them, so the
+output parses to the same values as before.
+
+Anything the fast path cannot reproduce is rendered by JSONRenderer
+itself: indented output (?indent / browsable API), non-default
+UNICODE_JSON / COMPACT_JSON / STRICT_JSON settings, integers wider than
+64 bits, or a missing orjson package. Known differences: floats use the
+shortest repr without a '+' or leading zero in exponents (1e16 rather than
+1e+16), and NaN/Infinity floats render as null instead of raising.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    # Optional speed-up; without it JSONRenderer does all the work
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode('utf-8')
+PARAGRAPH_SEPARATOR = '\u2029'.encode('utf-8')
+
+
+class ORJSONRenderer(JSONRenderer):
+    encoder = JSONEncoder()
+
+    @property
+    def fast_path(self):
+        return orjson is not None and not self.ensure_ascii and self.compact and self.strict
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.fast_path or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
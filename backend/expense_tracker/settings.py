@@ -118,6 +118,13 @@ STATICFILES_DIRS = []
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 🤖 ML MODEL ARTIFACTS (published by `manage.py train_categorizer`, memory-mapped by workers)
+ML_ARTIFACT_DIR = os.environ.get('ML_ARTIFACT_DIR', os.path.join(BASE_DIR, 'ml_artifacts'))
+
+# 🧾 PDF RECEIPTS: processes OCRing scanned pages, started by each web worker on its
+# first multi-page scan and kept until it exits (1 OCRs pages in the request itself)
+OCR_PDF_PROCESSES = int(os.environ.get('OCR_PDF_PROCESSES', 2))
+
 # 📱 STATICFILES STORAGE (WHITENOISE)
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -126,15 +133,36 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # 🔗 REST FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.backends.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed drop-ins for JSONRenderer/JSONParser (same output, faster)
+    'DEFAULT_RENDERER_CLASSES': [
+        'expense_tracker.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'expense_tracker.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# Resolved API tokens are kept in the shared cache (CACHE_URL below) so
+# authenticating a request needs no query, and a logout revokes the token in
+# every worker at once (see authentication/backends.py). AUTH_TOKEN_CACHE_TTL
+# adds a per-process tier that other workers cannot revoke: only set it when
+# running a single worker process.
+AUTH_TOKEN_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 4096)),
+    'TTL': int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 0)),
+    'SHARED': os.environ.get('AUTH_TOKEN_CACHE_SHARED', 'True').lower() == 'true',
+}
+
 # 🌍 CORS SETTINGS FOR PRODUCTION
 CORS_ALLOWED_ORIGINS = [
     "https://smart-expense-tracker-with-ai-insig-eight.vercel.app",  # ✅ NEW Production URL
@@ -176,13 +204,36 @@ if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
     SECURE_SSL_REDIRECT = True
 
-# Disable caching in development to prevent issues
-if DEBUG:
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-        }
+# 🧠 CACHE (analytics responses, see expenses/cache.py)
+# A write invalidates a user's cached analytics by replacing one version key,
+# which only reaches every worker when they all use the same cache. Caching is
+# therefore off unless CACHE_URL names one:
+#   dummy://                no caching (the default)
+#   file:///var/tmp/cache   shared by all workers on one host
+#   redis://host:6379/1     shared by all hosts (needs the redis package)
+#   locmem://               per-process memory; only correct with a single worker process
+def cache_config(url):
+    scheme, _, location = url.partition('://')
+    backends = {
+        'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        'file': 'django.core.cache.backends.filebased.FileBasedCache',
+        'redis': 'django.core.cache.backends.redis.RedisCache',
+        'rediss': 'django.core.cache.backends.redis.RedisCache',
+        'dummy': 'django.core.cache.backends.dummy.DummyCache',
     }
+    if scheme not in backends:
+        raise ValueError(f'Unsupported CACHE_URL scheme: {scheme}')
+    config = {'BACKEND': backends[scheme], 'KEY_PREFIX': 'expense-tracker'}
+    if scheme.startswith('redis'):
+        config['LOCATION'] = url
+    elif location:
+        config['LOCATION'] = location
+    return config
+
+CACHES = {
+    'default': cache_config(os.environ.get('CACHE_URL', 'dummy://'))
+}
+ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT', 3600))
 
 # 📝 PRODUCTION LOGGING
 LOGGING = {
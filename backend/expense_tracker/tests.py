@@ -0,0 +1,106 @@
+import json
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from expenses.models import Expense
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertSameBytes(self, data, accepted_media_type=None, renderer_context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, renderer_context)
+        actual = ORJSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_api_value_types_render_byte_for_byte(self):
+        self.assertSameBytes(ReturnDict({
+            'amount': Decimal('1234.50'),
+            'amounts': [Decimal('0.10'), Decimal('-99'), Decimal('12345678.99')],
+            'date': date(2025, 3, 9),
+            'utc': datetime(2025, 3, 9, 10, 30, tzinfo=dt_timezone.utc),
+            'zero_offset_zone': datetime(2025, 1, 5, 10, 0, tzinfo=ZoneInfo('Europe/London')),
+            'kolkata': datetime(2025, 3, 9, 16, 0, 0, 123456, tzinfo=ZoneInfo('Asia/Kolkata')),
+            'naive': datetime(2025, 3, 9, 10, 30, 15),
+            'time': time(9, 5),
+            'duration': timedelta(hours=1, seconds=3),
+            'lazy': gettext_lazy('This field is required.'),
+            'lazy_list': [gettext_lazy('Invalid category selected')],
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'unicode': 'Café ₹ \U0001F37D️',
+            'separators': 'a b c',
+            'nested': ReturnList([OrderedDict([('id', 1), ('ok', True), ('none', None)])], serializer=None),
+            'tuple': (1, 2.5, 'x'),
+            'bytes': b'raw',
+            'numbers': {1: 'int key', None: 'null key', True: 'bool key'},
+        }, serializer=None))
+
+    def test_float_exponents_keep_their_values(self):
+        data = {'values': [1e16, 1e-7, 0.1 + 0.2, Decimal('1E+20')]}
+
+        actual = ORJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(actual), json.loads(JSONRenderer().render(data)))
+
+    def test_indented_and_out_of_range_output_falls_back_to_json_renderer(self):
+        self.assertSameBytes({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertSameBytes({'big': 2 ** 70})
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({'unsupported': object()})
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, parser, body):
+        return parser.parse(BytesIO(body), 'application/json', {'encoding': 'utf-8'})
+
+    def test_parses_like_json_parser(self):
+        for body in (
+            b'{"title": "Caf\\u00e9 \xe2\x82\xb9", "amount": "12.50", "items": [1, 2.5, null, true]}',
+            b'{"big": 123456789012345678901234567890}',
+            b'[]',
+        ):
+            self.assertEqual(self.parse(ORJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_invalid_bodies_fail_with_json_parser_messages(self):
+        for body in (b'{"title": ', b'{"amount": NaN}', b'\xff'):
+            with self.assertRaises(ParseError) as expected:
+                self.parse(JSONParser(), body)
+            with self.assertRaises(ParseError) as actual:
+                self.parse(ORJSONParser(), body)
+            self.assertEqual(str(actual.exception.detail), str(expected.exception.detail))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ORJSONEndToEndTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ivan', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def test_created_expense_round_trips_through_the_api(self):
+        response = self.client.post('/api/expenses/expenses/', {
+            'title': 'Café Coffee Day', 'amount': '249.50', 'category': 'food_dining', 'date': '2025-03-09',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        listed = self.client.get('/api/expenses/expenses/', HTTP_ACCEPT='application/json')
+
+        self.assertEqual(listed.content, JSONRenderer().render(listed.data))
+        self.assertEqual(listed.json()['results'][0]['amount'], '249.50')
+        self.assertEqual(Expense.objects.get().title, 'Café Coffee Day')
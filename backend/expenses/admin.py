@@ -1,6 +1,6 @@
 # backend/expenses/admin.py
 from django.contrib import admin
-from .models import Category, Expense, Budget
+from .models import Category, Expense, ExpenseRollup, Budget
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -23,6 +23,16 @@ class ExpenseAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user', 'category')
 
+@admin.register(ExpenseRollup)
+class ExpenseRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'category', 'payment_method', 'total', 'count']
+    list_filter = ['category', 'payment_method', 'month']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'month', 'category', 'payment_method', 'total', 'count']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
 @admin.register(Budget)
 class BudgetAdmin(admin.ModelAdmin):
     list_display = ['user', 'category', 'amount', 'period', 'start_date', 'end_date', 'is_active']
@@ -0,0 +1,220 @@
+# backend/expenses/analytics.py - AGGREGATE QUERIES FOR DASHBOARD STATS
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .categories import CATEGORIES, get_category
+from .models import ExpenseRollup
+
+DEFAULT_STATS_MONTHS = 6
+MAX_STATS_MONTHS = 60
+TOP_CATEGORY_LIMIT = 5
+
+TIMESERIES_GRANULARITIES = ('day', 'week', 'month', 'year')
+TIMESERIES_GROUPS = ('category', 'payment_method')
+DEFAULT_TIMESERIES_BUCKETS = {'day': 30, 'week': 12, 'month': 12, 'year': 5}
+# Enough for a daily heatmap over a leap year plus some margin
+MAX_TIMESERIES_BUCKETS = 400
+
+
+def add_months(day, months):
+    """Return the first day of the month `months` away from `day`'s month"""
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+def month_buckets(months, today=None):
+    """Calendar month starts, oldest first, ending with the current month"""
+    today = today or timezone.localdate()
+    current = today.replace(day=1)
+    return [add_months(current, offset) for offset in range(1 - months, 1)]
+
+
+def rollup_snapshot(user):
+    """
+    The user's rollups as (month, category, total, count) rows in one query.
+    Stats, insights and the dashboard derive their aggregates from it, so
+    one fetch can serve all of them.
+    """
+    return list(
+        ExpenseRollup.objects.filter(user=user)
+        .order_by()
+        .values('month', 'category')
+        .annotate(month_total=Sum('total'), month_count=Sum('count'))
+        .values_list('month', 'category', 'month_total', 'month_count')
+    )
+
+
+def expense_stats_snapshot(user, months=DEFAULT_STATS_MONTHS, today=None, rollups=None):
+    """
+    Raw dashboard stats: totals, per-category sums and the monthly trend,
+    summed from rollup_snapshot() rows (fetched unless `rollups` is given).
+    Amounts stay Decimal.
+    """
+    if rollups is None:
+        rollups = rollup_snapshot(user)
+
+    total, count = Decimal(0), 0
+    category_totals = {}
+    monthly_totals = {}
+    for month, category, month_total, month_count in rollups:
+        total += month_total
+        count += month_count
+        sums = category_totals.setdefault(category, [Decimal(0), 0])
+        sums[0] += month_total
+        sums[1] += month_count
+        monthly_totals[month] = monthly_totals.get(month, 0) + month_total
+
+    categories = [
+        (slug, *category_totals[slug])
+        for slug in CATEGORIES
+        if slug in category_totals and category_totals[slug][1]
+    ]
+    categories.sort(key=lambda item: item[1], reverse=True)
+
+    # Monthly trend over whole calendar months
+    buckets = month_buckets(months, today)
+    return {
+        'total': total,
+        'count': count,
+        'categories': categories,  # (slug, total, count), largest first
+        'monthly': [(bucket, monthly_totals.get(bucket) or 0) for bucket in buckets],
+    }
+
+
+def get_expense_stats(user, months=DEFAULT_STATS_MONTHS, today=None, rollups=None):
+    """Build the dashboard stats payload (see expense_stats_snapshot)"""
+    snapshot = expense_stats_snapshot(user, months, today, rollups)
+    categories = snapshot['categories']
+
+    monthly_trend = [
+        {
+            'month': calendar.month_name[bucket.month],
+            'year': bucket.year,
+            'amount': float(amount),
+        }
+        for bucket, amount in snapshot['monthly']
+    ]
+
+    category_breakdown = []
+    for slug, total, count in categories[:TOP_CATEGORY_LIMIT]:
+        info = get_category(slug)
+        category_breakdown.append({
+            'category__name': info.name,
+            'category__color': info.color,
+            'total': float(total),
+            'count': count,
+        })
+
+    total = snapshot['total']
+    count = snapshot['count']
+    return {
+        'total_expenses': total,
+        'total_transactions': count,
+        'avg_transaction': total / count if count else 0,
+        'top_category': get_category(categories[0][0]).name if categories else 'None',
+        'monthly_trend': monthly_trend,
+        'category_breakdown': category_breakdown,
+    }
+
+
+def budget_alerts(budgets):
+    """Alerts for budgets at 80% or more of their amount; `budgets` should be with_spent_amount()"""
+    alerts = []
+    for budget in budgets:
+        progress = budget.progress_percentage
+        if progress >= 80:
+            alert_type = 'danger' if progress >= 100 else 'warning'
+            alerts.append({
+                'id': budget.id,
+                'category': budget.category_name,
+                'message': f"You've spent {progress:.1f}% of your {budget.category_name} budget",
+                'type': alert_type,
+                'spent': budget.spent_amount,
+                'budget': budget.amount
+            })
+    return alerts
+
+
+def bucket_start(day, granularity):
+    """Start of the day/week (Monday)/month/year bucket containing `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def shift_buckets(start, granularity, count):
+    """Start of the bucket `count` buckets away from the (aligned) bucket `start`"""
+    if granularity == 'month':
+        return add_months(start, count)
+    if granularity == 'year':
+        return start.replace(year=start.year + count)
+    return start + timedelta(days=count * (7 if granularity == 'week' else 1))
+
+
+def bucket_count(start, end, granularity):
+    """Number of buckets touching [start, end], without building them"""
+    first, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    if granularity == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    if granularity == 'year':
+        return last.year - first.year + 1
+    return (last - first).days // (7 if granularity == 'week' else 1) + 1
+
+
+def time_buckets(start, end, granularity):
+    """Bucket starts covering [start, end], oldest first"""
+    first = bucket_start(start, granularity)
+    return [shift_buckets(first, granularity, offset) for offset in range(bucket_count(start, end, granularity))]
+
+
+def default_timeseries_start(end, granularity):
+    """Start of the default window: the last DEFAULT_TIMESERIES_BUCKETS buckets up to `end`"""
+    return shift_buckets(bucket_start(end, granularity), granularity, 1 - DEFAULT_TIMESERIES_BUCKETS[granularity])
+
+
+def spending_timeseries(queryset, start, end, granularity='day', group_by=None):
+    """
+    Spending per bucket over [start, end] in one GROUP BY on the truncated
+    date (plus `group_by` when given). Every bucket is present, empty ones
+    as zero, in (bucket, total, count) points:
+
+        {'totals': [...points], 'groups': {key: [...points]}}  # groups only with group_by
+    """
+    group_fields = (group_by,) if group_by else ()
+    rows = (
+        queryset.filter(date__range=[start, end])
+        .order_by()
+        .annotate(bucket=Trunc('date', granularity, output_field=DateField()))
+        .values('bucket', *group_fields)
+        .annotate(bucket_total=Sum('amount'), bucket_count=Count('id'))
+        .values_list('bucket', *group_fields, 'bucket_total', 'bucket_count')
+    )
+
+    buckets = time_buckets(start, end, granularity)
+    totals = {bucket: [Decimal(0), 0] for bucket in buckets}
+    groups = {}
+    for row in rows:
+        bucket, total, count = row[0], row[-2], row[-1]
+        totals[bucket][0] += total
+        totals[bucket][1] += count
+        if group_by:
+            groups.setdefault(row[1], {})[bucket] = (total, count)
+
+    def points(values):
+        return [(bucket, *values.get(bucket, (0, 0))) for bucket in buckets]
+
+    series = {'totals': points(totals)}
+    if group_by:
+        # Largest group first, like the category breakdown
+        ranked = sorted(groups.items(), key=lambda item: sum(total for total, _ in item[1].values()), reverse=True)
+        series['groups'] = {key: points(values) for key, values in ranked}
+    return series
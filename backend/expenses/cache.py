@@ -0,0 +1,189 @@
+# backend/expenses/cache.py - PER-USER VERSIONED CACHE FOR ANALYTICS RESPONSES
+"""
+Analytics results are cached under a key that includes the user's data
+version:
+
+    analytics:version:<user id>                              opaque token
+    analytics:<name>:<user id>:<version>:<params digest>     computed result
+
+Every Expense/Budget write replaces the version token (see signals.py), so
+entries computed from older data are never read again and simply expire.
+Nothing has to enumerate or delete them, which keeps invalidation a single
+cache write on any backend (local memory, file-based or Redis).
+
+The same version token is the validator for conditional GETs: a request
+whose If-None-Match still matches is answered 304 before the view runs.
+That is only sound when every worker reads the same version, so
+conditional GETs are skipped on per-process (local memory) and dummy
+caches, where a worker that missed a write would confirm a stale copy.
+"""
+import hashlib
+import logging
+import threading
+import uuid
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'analytics'
+
+
+class CacheStats:
+    """Process-local hit/miss counters per cached endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def record(self, name, hit):
+        with self.lock:
+            (self.hits if hit else self.misses)[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {'hits': self.hits[name], 'misses': self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+
+
+def is_shared_cache(cache=None):
+    """Whether the analytics cache is one every worker process reads and writes"""
+    return not isinstance(cache or get_cache(), (LocMemCache, DummyCache))
+
+
+def _version_key(user_id):
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def _new_version():
+    # A fresh random token rather than a counter: concurrent bumps cannot be lost
+    # and a version key evicted from the cache never resurrects old entries
+    return uuid.uuid4().hex
+
+
+def data_version(user_id):
+    """The user's current data version, creating one on first use"""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_data_version(user_id):
+    """
+    Invalidate every cached result of the user. The version is replaced now,
+    so the writing request sees its own changes, and again on commit, so a
+    concurrent request that read the pre-commit data cannot leave its result
+    under the current version.
+    """
+    def bump():
+        get_cache().set(_version_key(user_id), _new_version(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cached_for_user(user, name, compute, *params):
+    """
+    Return compute() for `user`, cached until the user's data changes.
+    `params` (plus today's date, which month windows depend on) are part of
+    the key. Returns (result, hit).
+    """
+    cache = get_cache()
+    digest = hashlib.sha1(repr((timezone.localdate(), params)).encode('utf-8')).hexdigest()[:16]
+    key = f'{KEY_PREFIX}:{name}:{user.pk}:{data_version(user.pk)}:{digest}'
+
+    result = cache.get(key)
+    hit = result is not None
+    stats.record(name, hit)
+    if not hit:
+        result = compute()
+        cache.set(key, result, timeout=getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 3600))
+    logger.debug('Analytics cache %s for %s (user %s)', 'hit' if hit else 'miss', name, user.pk)
+    return result, hit
+
+
+def with_cache_status(response, hit):
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def data_etag(request, name):
+    """Weak ETag for a GET of `name`: changes with the user's data, the URL and the Accept header"""
+    token = repr((
+        name, request.user.pk, data_version(request.user.pk), timezone.localdate(),
+        request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+    ))
+    return 'W/' + quote_etag(hashlib.sha1(token.encode('utf-8')).hexdigest())
+
+
+def _etag_matches(etag, if_none_match):
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = parse_etags(if_none_match)
+    return '*' in candidates or any(
+        candidate.removeprefix('W/') == etag.removeprefix('W/') for candidate in candidates
+    )
+
+
+def conditional_get(name):
+    """
+    Decorate a DRF view or viewset action so GETs carry an ETag derived from
+    the user's data version, and a matching If-None-Match is answered 304
+    without querying, serializing or aggregating anything. A no-op unless
+    the cache is shared (see is_shared_cache).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            request = args[-1]
+            if (
+                request.method not in ('GET', 'HEAD')
+                or not request.user.is_authenticated
+                or not is_shared_cache()
+            ):
+                return view(*args, **kwargs)
+
+            etag = data_etag(request, name)
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and _etag_matches(etag, if_none_match):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view(*args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            response['ETag'] = etag
+            # Let browsers keep the body but revalidate it on every use
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,56 @@
+# backend/expenses/categories.py - THE EXPENSE CATEGORY REGISTRY
+"""
+Every category's slug, display name, icon and colour, built once at import.
+Models, serializers, analytics, the categorizer and the management
+commands all read from here; the frontend keeps its own copy in sync.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+DEFAULT_CATEGORY = 'other'
+
+_CATEGORIES = (
+    # slug, display name, icon, colour
+    ('food_dining', 'Food & Dining', '🍽️', '#FF6B6B'),
+    ('transportation', 'Transportation', '🚗', '#4ECDC4'),
+    ('shopping', 'Shopping', '🛍️', '#45B7D1'),
+    ('entertainment', 'Entertainment', '🎬', '#96CEB4'),
+    ('healthcare', 'Healthcare', '🏥', '#FFEAA7'),
+    ('utilities', 'Utilities', '⚡', '#DDA0DD'),
+    ('education', 'Education', '📚', '#98D8C8'),
+    ('groceries', 'Groceries', '🛒', '#F7DC6F'),
+    ('fitness', 'Fitness', '💪', '#BB8FCE'),
+    ('travel', 'Travel', '✈️', '#85C1E9'),
+    ('bills_subscriptions', 'Bills & Subscriptions', '📄', '#F8C471'),
+    ('clothing', 'Clothing', '👕', '#82E0AA'),
+    ('electronics', 'Electronics', '📱', '#AED6F1'),
+    ('home_garden', 'Home & Garden', '🏠', '#A9DFBF'),
+    ('gifts_donations', 'Gifts & Donations', '🎁', '#F1948A'),
+    ('other', 'Other', '💰', '#D5DBDB'),
+)
+
+
+class CategoryInfo(namedtuple('CategoryInfo', 'id value name icon color')):
+    __slots__ = ()
+
+    def display_info(self):
+        """The {'name', 'icon', 'color'} shape of get_category_display_info()"""
+        return {'name': self.name, 'icon': self.icon, 'color': self.color}
+
+    def payload(self):
+        """The full API shape, as served by the hardcoded category list"""
+        return self._asdict()
+
+
+CATEGORIES = MappingProxyType({
+    slug: CategoryInfo(index, slug, name, icon, color)
+    for index, (slug, name, icon, color) in enumerate(_CATEGORIES, start=1)
+})
+CATEGORY_SLUGS = frozenset(CATEGORIES)
+CATEGORY_CHOICES = tuple((info.value, info.name) for info in CATEGORIES.values())
+CATEGORY_SLUGS_BY_NAME = MappingProxyType({info.name.lower(): slug for slug, info in CATEGORIES.items()})
+
+
+def get_category(slug):
+    """Registry entry for `slug`; unknown slugs display as the default category"""
+    return CATEGORIES.get(slug) or CATEGORIES[DEFAULT_CATEGORY]
@@ -0,0 +1,137 @@
+# backend/expenses/columnar.py - COMPACT COLUMN-ARRAY RESPONSES FOR CHARTS
+"""
+An alternative representation for the expense list, stats and time series,
+negotiated with ?format=columnar / ?format=columnar-msgpack or the media
+types below in Accept. Repeated objects become parallel column arrays:
+
+    {"origin": "2025-03-01", "date": [0, 0, 4], "amount": [24950, 1200, 89900], "category": [1, 8, 1]}
+
+- dates are day offsets from `origin`, the earliest date in the payload
+- amounts are integers in paise (hundredths of the currency unit)
+- categories are the `id` codes of expenses/categories.py, the same codes
+  /api/expenses/categories/hardcoded_list/ serves; 0 means none
+
+msgpack encoding is available when the msgpack package is installed.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from expense_tracker.renderers import ORJSONRenderer
+from .analytics import TOP_CATEGORY_LIMIT
+from .categories import get_category
+
+try:
+    import msgpack
+except ImportError:
+    # Optional; without it only the JSON encoding of the columnar format is offered
+    msgpack = None
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    media_type = 'application/vnd.expenses.columnar+json'
+    format = 'columnar'
+
+
+class ColumnarMsgpackRenderer(BaseRenderer):
+    media_type = 'application/vnd.expenses.columnar+msgpack'
+    format = 'columnar-msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Error bodies may still carry Decimals, dates or lazy strings
+        return msgpack.packb(data, default=self.encoder.default)
+
+
+COLUMNAR_RENDERERS = (ColumnarJSONRenderer,) + ((ColumnarMsgpackRenderer,) if msgpack else ())
+
+
+def is_columnar(request):
+    return isinstance(getattr(request, 'accepted_renderer', None), COLUMNAR_RENDERERS)
+
+
+def paise(amount):
+    """Decimal/int rupee amount -> integer paise"""
+    return int(Decimal(amount or 0).scaleb(2).to_integral_value())
+
+
+def category_code(slug):
+    return get_category(slug).id if slug else 0
+
+
+def day_offsets(dates):
+    """(origin, [days since origin]) for a sequence of dates"""
+    if not dates:
+        return None, []
+    origin = min(dates)
+    return origin, [(day - origin).days for day in dates]
+
+
+def expense_columns(rows):
+    """Columns for a page of ExpenseRowSerializer.rows()"""
+    rows = list(rows)
+    origin, dates = day_offsets([row.date for row in rows])
+    return {
+        'origin': origin,
+        'id': [row.id for row in rows],
+        'date': dates,
+        'amount': [paise(row.amount) for row in rows],
+        'category': [category_code(row.category) for row in rows],
+        'payment_method': [row.payment_method for row in rows],
+        'title': [row.title for row in rows],
+        'description': [row.description for row in rows],
+        'is_recurring': [row.is_recurring for row in rows],
+        'is_ai_categorized': [row.is_ai_categorized for row in rows],
+    }
+
+
+def stats_columns(snapshot):
+    """Columnar form of analytics.expense_stats_snapshot()"""
+    categories = snapshot['categories'][:TOP_CATEGORY_LIMIT]
+    origin, months = day_offsets([bucket for bucket, _ in snapshot['monthly']])
+    total, count = paise(snapshot['total']), snapshot['count']
+    return {
+        'total_expenses': total,
+        'total_transactions': count,
+        'avg_transaction': round(total / count) if count else 0,
+        'top_category': category_code(categories[0][0] if categories else None),
+        'monthly_trend': {
+            'origin': origin,
+            'month': months,
+            'amount': [paise(amount) for _, amount in snapshot['monthly']],
+        },
+        'category_breakdown': {
+            'category': [category_code(slug) for slug, _, _ in categories],
+            'total': [paise(amount) for _, amount, _ in categories],
+            'count': [count for _, _, count in categories],
+        },
+    }
+
+
+def series_columns(points):
+    """Columns for (date, total, count) points"""
+    origin, dates = day_offsets([day for day, _, _ in points])
+    return {
+        'origin': origin,
+        'date': dates,
+        'amount': [paise(amount) for _, amount, _ in points],
+        'count': [count for _, _, count in points],
+    }
+
+
+def timeseries_columns(series, group_by=None):
+    """Columnar form of analytics.spending_timeseries(); groups share the totals' date column"""
+    columns = series_columns(series['totals'])
+    if group_by:
+        keys = list(series['groups'])
+        columns['groups'] = {
+            'key': [category_code(key) for key in keys] if group_by == 'category' else keys,
+            'amount': [[paise(amount) for _, amount, _ in series['groups'][key]] for key in keys],
+            'count': [[count for _, _, count in series['groups'][key]] for key in keys],
+        }
+    return columns
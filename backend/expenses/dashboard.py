@@ -0,0 +1,71 @@
+# backend/expenses/dashboard.py - THE DASHBOARD IN ONE ROUND TRIP
+"""
+Stats, recent expenses, budget alerts and spending insights for one user,
+built for a single request. Stats and insights share one rollup_snapshot()
+fetch, and each section goes through the same analytics cache entry as its
+standalone endpoint, so whatever either side computed is reused by the other.
+"""
+from functools import cached_property
+
+from django.utils import timezone
+
+from ai_insights.ml_service import SpendingAnalyzer
+from .analytics import DEFAULT_STATS_MONTHS, budget_alerts, get_expense_stats, rollup_snapshot
+from .cache import cached_for_user
+from .models import Budget, Expense
+from .serializers import ExpenseRowSerializer, ExpenseStatsSerializer
+
+SECTIONS = ('stats', 'recent', 'alerts', 'insights')
+RECENT_LIMIT = 10
+
+
+class DashboardSnapshot:
+    """Per-request aggregates, fetched on first use and shared by every section"""
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+
+    @cached_property
+    def rollups(self):
+        return rollup_snapshot(self.user)
+
+    def stats(self):
+        # Same key as ExpenseViewSet.stats with the default window
+        stats_data, _ = cached_for_user(
+            self.user, 'stats',
+            lambda: ExpenseStatsSerializer(
+                get_expense_stats(self.user, months=DEFAULT_STATS_MONTHS, rollups=self.rollups)
+            ).data,
+            DEFAULT_STATS_MONTHS
+        )
+        return stats_data
+
+    def recent(self):
+        rows = ExpenseRowSerializer.rows(
+            Expense.objects.filter(user=self.user).order_by('-date', '-created_at')
+        )[:RECENT_LIMIT]
+        return ExpenseRowSerializer(context={'request': self.request}).serialize(rows)
+
+    def alerts(self):
+        alerts, _ = cached_for_user(
+            self.user, 'budget_alerts',
+            lambda: budget_alerts(Budget.objects.filter(user=self.user, is_active=True).with_spent_amount())
+        )
+        return alerts
+
+    def insights(self):
+        # Mirrors the spending_insights view, including its empty fallback
+        try:
+            body, _ = cached_for_user(self.user, 'spending_insights', lambda: {
+                'insights': SpendingAnalyzer.get_spending_insights(self.user, rollups=self.rollups),
+                'generated_at': timezone.now()
+            })
+            return body
+        except Exception as e:
+            return {'insights': [], 'error': str(e), 'generated_at': timezone.now()}
+
+
+def build_dashboard(request, sections=SECTIONS):
+    snapshot = DashboardSnapshot(request)
+    return {section: getattr(snapshot, section)() for section in sections}
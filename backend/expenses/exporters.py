@@ -0,0 +1,186 @@
+# backend/expenses/exporters.py - STREAMING CSV / XLSX EXPENSE EXPORT
+import csv
+import re
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+from .categories import CATEGORY_CHOICES
+from .models import Expense
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_HEADERS = ['Date', 'Title', 'Category', 'Amount', 'Payment Method', 'Description']
+EXPORT_FIELDS = ['date', 'title', 'category', 'amount', 'payment_method', 'description']
+
+CATEGORY_NAMES = dict(CATEGORY_CHOICES)
+PAYMENT_METHOD_NAMES = dict(Expense.PAYMENT_METHODS)
+
+# Cells starting with these are evaluated as formulas by spreadsheet apps
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# XML 1.0 cannot carry most control characters
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def export_rows(queryset):
+    """Yield (date, title, category, amount, payment method, description) tuples in chunks"""
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for expense_date, title, category, amount, payment_method, description in rows:
+        yield (
+            expense_date,
+            title,
+            CATEGORY_NAMES.get(category, category),
+            amount,
+            PAYMENT_METHOD_NAMES.get(payment_method, payment_method),
+            description or '',
+        )
+
+
+def _safe_text(value):
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+class _Echo:
+    """File-like object that hands back what is written, for csv.writer"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for expense_date, title, category, amount, payment_method, description in rows:
+        yield writer.writerow([
+            expense_date.isoformat(), _safe_text(title), category, amount,
+            payment_method, _safe_text(description),
+        ])
+
+
+class _ChunkSink:
+    """Write-only, non-seekable sink; zipfile falls back to streaming mode"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Expenses" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Cell styles: 0 = default, 1 = date (yyyy-mm-dd), 2 = amount (0.00)
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="2" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+XLSX_EPOCH = date(1899, 12, 30)
+
+
+def _xlsx_text(value):
+    value = INVALID_XML_CHARS.sub('', str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+
+
+def _xlsx_row(cells):
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def stream_xlsx(rows, flush_every=500):
+    """
+    Constant-memory XLSX writer: the worksheet uses inline strings (no shared
+    string table) and is deflated straight into the response as rows arrive.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        workbook.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        workbook.writestr('xl/styles.xml', XLSX_STYLES)
+        yield sink.drain()
+
+        with workbook.open('xl/worksheets/sheet1.xml', mode='w') as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(_xlsx_text(header) for header in EXPORT_HEADERS)
+            ).encode('utf-8'))
+
+            buffered = []
+            for expense_date, title, category, amount, payment_method, description in rows:
+                buffered.append(_xlsx_row([
+                    f'<c s="1"><v>{(expense_date - XLSX_EPOCH).days}</v></c>',
+                    _xlsx_text(title),
+                    _xlsx_text(category),
+                    f'<c s="2"><v>{amount}</v></c>',
+                    _xlsx_text(payment_method),
+                    _xlsx_text(description),
+                ]))
+                if len(buffered) >= flush_every:
+                    sheet.write(''.join(buffered).encode('utf-8'))
+                    buffered = []
+                    yield sink.drain()
+            sheet.write((''.join(buffered) + '</sheetData></worksheet>').encode('utf-8'))
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,296 @@
+# backend/expenses/importers.py - STREAMING BANK STATEMENT IMPORT (CSV / OFX / QIF)
+import csv
+import io
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from ai_insights.classifier import expense_text
+from ai_insights.ml_service import ExpenseCategorizer
+from ai_insights.models import CategorizerCount
+from .cache import bump_data_version
+from .categories import CATEGORY_SLUGS, CATEGORY_SLUGS_BY_NAME
+from .models import Expense, ExpenseRollup
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_AMOUNT = Decimal('99999999.99')  # Expense.amount is max_digits=10, decimal_places=2
+
+DATE_FORMATS = (
+    '%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y', '%d-%m-%y',
+    '%d %b %Y', '%d-%b-%Y', '%d %B %Y', '%Y%m%d', '%Y/%m/%d',
+)
+
+# CSV header aliases, most specific first
+TITLE_COLUMNS = ('title', 'payee', 'merchant', 'name', 'narration', 'description', 'details', 'particulars')
+DESCRIPTION_COLUMNS = ('description', 'memo', 'notes', 'remarks', 'narration', 'details')
+DATE_COLUMNS = ('date', 'transaction date', 'txn date', 'value date', 'posted date')
+AMOUNT_COLUMNS = ('amount', 'debit', 'withdrawal', 'withdrawal amount', 'debit amount')
+CREDIT_COLUMNS = ('credit', 'deposit', 'credit amount', 'deposit amount')
+CATEGORY_COLUMNS = ('category',)
+PAYMENT_METHOD_COLUMNS = ('payment_method', 'payment method')
+
+PAYMENT_METHOD_SLUGS = {slug for slug, _ in Expense.PAYMENT_METHODS}
+
+OFX_TRANSACTION_RE = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_FIELD_RE = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+class StatementImportError(Exception):
+    """Raised when an upload cannot be read as a statement at all"""
+
+def detect_format(filename, requested=None):
+    """Pick the statement format from an explicit request or the file extension"""
+    fmt = (requested or filename.rsplit('.', 1)[-1]).lower()
+    if fmt == 'qfx':
+        fmt = 'ofx'
+    if fmt not in PARSERS:
+        raise StatementImportError('Unsupported statement format; use CSV, OFX or QIF')
+    return fmt
+
+def _text_stream(uploaded_file):
+    # Decode lazily so the upload is never read into memory as a whole
+    raw = getattr(uploaded_file, 'file', uploaded_file)
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ''):
+            return column, value.strip()
+    return None, ''
+
+def parse_csv(uploaded_file):
+    """Yield (row_number, fields) for each CSV data row"""
+    reader = csv.reader(_text_stream(uploaded_file))
+    try:
+        header = [column.strip().lower() for column in next(reader)]
+    except StopIteration:
+        return
+
+    for row_number, values in enumerate(reader, start=2):
+        if not any(values):
+            continue
+        row = dict(zip(header, values))
+        title_column, title = _first(row, TITLE_COLUMNS)
+        _, description = _first(row, [c for c in DESCRIPTION_COLUMNS if c != title_column])
+        _, amount = _first(row, AMOUNT_COLUMNS)
+        yield row_number, {
+            'title': title,
+            'description': description,
+            'date': _first(row, DATE_COLUMNS)[1],
+            'amount': amount,
+            'category': _first(row, CATEGORY_COLUMNS)[1],
+            'payment_method': _first(row, PAYMENT_METHOD_COLUMNS)[1],
+            'debits_only': False,
+            # Separate debit/credit columns: a row with only a credit is income
+            'is_credit': not amount and bool(_first(row, CREDIT_COLUMNS)[1]),
+        }
+
+def parse_ofx(uploaded_file, chunk_size=64 * 1024):
+    """Yield (transaction_number, fields) for each <STMTTRN> block"""
+    stream = _text_stream(uploaded_file)
+    buffer = ''
+    number = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        last_end = 0
+        for match in OFX_TRANSACTION_RE.finditer(buffer):
+            number += 1
+            fields = {name.upper(): value.strip() for name, value in OFX_FIELD_RE.findall(match.group(1))}
+            yield number, {
+                'title': fields.get('NAME') or fields.get('MEMO', ''),
+                'description': fields.get('MEMO', '') if fields.get('NAME') else '',
+                'date': fields.get('DTPOSTED', '')[:8],
+                'amount': fields.get('TRNAMT', ''),
+                'category': '',
+                'payment_method': '',
+                'debits_only': True,
+            }
+            last_end = match.end()
+        # Keep only the unfinished tail of the buffer
+        buffer = buffer[last_end:]
+        if not chunk:
+            break
+
+def parse_qif(uploaded_file):
+    """Yield (record_number, fields) for each '^'-terminated QIF record"""
+    record = {}
+    number = 0
+    for line in _text_stream(uploaded_file):
+        line = line.strip()
+        if not line or line.startswith('!'):
+            continue
+        if line == '^':
+            if record:
+                number += 1
+                yield number, {
+                    'title': record.get('P') or record.get('M', ''),
+                    'description': record.get('M', '') if record.get('P') else '',
+                    'date': record.get('D', '').replace("'", '/'),
+                    'amount': record.get('T') or record.get('U', ''),
+                    'category': '',
+                    'payment_method': '',
+                    'debits_only': True,
+                }
+            record = {}
+            continue
+        record.setdefault(line[0], line[1:].strip())
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+    'qif': parse_qif,
+}
+
+class StatementImporter:
+    """
+    Validate statement rows in bulk and insert them with bulk_create.
+    Valid rows are inserted in one transaction; invalid rows are reported
+    back with their row number instead of failing the whole import.
+    """
+
+    def __init__(self, user, default_payment_method='cash', date_format=None, dry_run=False):
+        self.user = user
+        self.default_payment_method = default_payment_method
+        self.date_formats = (date_format,) if date_format else DATE_FORMATS
+        self.dry_run = dry_run
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+        self._dates = {}
+        self._labelled = []
+
+    def run(self, rows):
+        batch = []
+        rollup_deltas = {}
+        with transaction.atomic():
+            for row_number, fields in rows:
+                expense = self.build_expense(row_number, fields)
+                if expense is None:
+                    continue
+                batch.append(expense)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    self.flush(batch, rollup_deltas)
+                    batch = []
+            self.flush(batch, rollup_deltas)
+            if not self.dry_run:
+                # bulk_create skips the save signals, so apply rollups and labels in one pass
+                ExpenseRollup.objects.apply_many(rollup_deltas)
+                CategorizerCount.objects.learn(self.user.pk, added=self._labelled)
+                if self.created:
+                    bump_data_version(self.user.pk)
+        return self.report()
+
+    def flush(self, batch, rollup_deltas):
+        if not batch:
+            return
+        # Categorize the rows without a category in one vectorized call
+        pending = [expense for expense in batch if expense.category is None]
+        if pending:
+            categories = ExpenseCategorizer.categorize_batch(
+                [(expense.title, expense.description) for expense in pending], user=self.user
+            )
+            for expense, (category, _) in zip(pending, categories):
+                expense.category = category
+        if not self.dry_run:
+            self._labelled.extend(
+                (expense_text(expense.title, expense.description), expense.category)
+                for expense in batch if not expense.is_ai_categorized
+            )
+        for expense in batch:
+            key, amount = expense.rollup_state()
+            total, count = rollup_deltas.get(key, (0, 0))
+            rollup_deltas[key] = (total + amount, count + 1)
+        if not self.dry_run:
+            Expense.objects.bulk_create(batch, batch_size=IMPORT_BATCH_SIZE)
+        self.created += len(batch)
+
+    def build_expense(self, row_number, fields):
+        if fields.get('is_credit'):
+            self.skipped += 1
+            return None
+        errors = {}
+
+        title = fields['title']
+        if not title:
+            errors['title'] = 'Title is required'
+        elif len(title) > 200:
+            title = title[:200]
+
+        amount = None
+        try:
+            amount = Decimal(fields['amount'].replace(',', '').replace('₹', '').strip())
+        except (InvalidOperation, AttributeError):
+            pass
+        if amount is None or not amount.is_finite():
+            errors['amount'] = 'Amount must be a number'
+        else:
+            if fields['debits_only'] and amount > 0:
+                # Credits/deposits are not expenses
+                self.skipped += 1
+                return None
+            amount = abs(amount).quantize(Decimal('0.01'))
+            if amount == 0 or amount > MAX_AMOUNT:
+                errors['amount'] = 'Amount must be greater than 0 and at most 99999999.99'
+
+        expense_date = self.parse_date(fields['date'])
+        if expense_date is None:
+            errors['date'] = f"Unrecognised date: {fields['date']!r}"
+
+        category = fields['category']
+        is_ai_categorized = False
+        if category:
+            category = category if category in CATEGORY_SLUGS else CATEGORY_SLUGS_BY_NAME.get(category.lower())
+            if category is None:
+                errors['category'] = 'Invalid category selected'
+        else:
+            category = None  # filled in by flush()
+            is_ai_categorized = True
+
+        payment_method = fields['payment_method'] or self.default_payment_method
+        if payment_method not in PAYMENT_METHOD_SLUGS:
+            errors['payment_method'] = 'Invalid payment method'
+
+        if errors:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({'row': row_number, 'errors': errors})
+            return None
+
+        return Expense(
+            user=self.user,
+            title=title,
+            description=fields['description'] or None,
+            amount=amount,
+            date=expense_date,
+            category=category,
+            payment_method=payment_method,
+            is_ai_categorized=is_ai_categorized,
+        )
+
+    def parse_date(self, value):
+        value = (value or '').strip()
+        if value not in self._dates:
+            parsed = None
+            for fmt in self.date_formats:
+                try:
+                    parsed = datetime.strptime(value, fmt).date()
+                    break
+                except ValueError:
+                    continue
+            self._dates[value] = parsed
+        return self._dates[value]
+
+    def report(self):
+        return {
+            'created': self.created,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'dry_run': self.dry_run,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
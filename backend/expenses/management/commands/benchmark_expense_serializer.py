@@ -0,0 +1,70 @@
+# backend/expenses/management/commands/benchmark_expense_serializer.py
+
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from expenses.categories import CATEGORIES
+from expenses.models import Expense
+from expenses.serializers import ExpenseRowSerializer, ExpenseSerializer
+
+
+class Command(BaseCommand):
+    help = 'Per-row cost of ExpenseSerializer against the values_list() fast path, query included'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        largest = max(options['page_sizes'])
+        today = timezone.localdate()
+
+        # The benchmark user and expenses are rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+            Expense.objects.bulk_create(
+                Expense(
+                    user=user, title=f'Expense {i}', description=rng.choice([None, 'Paid via UPI']),
+                    amount=Decimal(rng.randint(100, 500000)) / 100, category=rng.choice(list(CATEGORIES)),
+                    date=today - timedelta(days=rng.randint(0, 365)),
+                )
+                for i in range(largest)
+            )
+            queryset = Expense.objects.filter(user=user).order_by('-date', '-created_at')
+            context = {'request': APIRequestFactory().get('/api/expenses/expenses/')}
+
+            for page_size in options['page_sizes']:
+                results = {}
+                for label, serialize in (
+                    ('ExpenseSerializer', lambda: ExpenseSerializer(
+                        queryset[:page_size], many=True, context=context
+                    ).data),
+                    ('ExpenseRowSerializer', lambda: ExpenseRowSerializer(context=context).serialize(
+                        ExpenseRowSerializer.rows(queryset)[:page_size]
+                    )),
+                ):
+                    serialize()  # warm up
+                    start = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        serialize()
+                    results[label] = (time.perf_counter() - start) / options['repeat']
+                    self.stdout.write(
+                        f'{page_size:>5} rows  {label:>20}: {results[label] * 1000:8.2f} ms per page, '
+                        f'{results[label] / page_size * 1e6:7.1f} µs per row'
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{page_size:>5} rows  speed-up: "
+                    f"{results['ExpenseSerializer'] / results['ExpenseRowSerializer']:.1f}x"
+                ))
+            transaction.set_rollback(True)
@@ -0,0 +1,80 @@
+# backend/expenses/management/commands/benchmark_json_renderer.py
+
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from expense_tracker.parsers import ORJSONParser
+from expense_tracker.renderers import ORJSONRenderer
+from expenses.categories import CATEGORIES
+from expenses.models import Expense
+from expenses.serializers import ExpenseRowSerializer
+
+
+class Command(BaseCommand):
+    help = 'Render and parse expense pages with JSONRenderer/JSONParser against the orjson versions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 1000, 5000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def timed(self, func, repeat):
+        func()  # warm up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        largest = max(options['page_sizes'])
+        today = timezone.localdate()
+        repeat = options['repeat']
+
+        # The benchmark user and expenses are rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+            Expense.objects.bulk_create(
+                Expense(
+                    user=user, title=f'Expense {i}', description=rng.choice([None, 'Paid via UPI']),
+                    amount=Decimal(rng.randint(100, 500000)) / 100, category=rng.choice(list(CATEGORIES)),
+                    date=today - timedelta(days=rng.randint(0, 365)),
+                )
+                for i in range(largest)
+            )
+            queryset = Expense.objects.filter(user=user).order_by('-date', '-created_at')
+            serializer = ExpenseRowSerializer(context={'request': APIRequestFactory().get('/api/expenses/expenses/')})
+
+            for page_size in options['page_sizes']:
+                page = {
+                    'count': page_size, 'next': None, 'previous': None,
+                    'results': serializer.serialize(ExpenseRowSerializer.rows(queryset)[:page_size]),
+                }
+                body = JSONRenderer().render(page)
+                if ORJSONRenderer().render(page) != body:
+                    self.stdout.write(self.style.WARNING(f'{page_size:>5} rows  rendered bytes differ'))
+
+                for action, baseline, candidate in (
+                    ('render', lambda: JSONRenderer().render(page), lambda: ORJSONRenderer().render(page)),
+                    ('parse', lambda: JSONParser().parse(BytesIO(body)), lambda: ORJSONParser().parse(BytesIO(body))),
+                ):
+                    before = self.timed(baseline, repeat)
+                    after = self.timed(candidate, repeat)
+                    self.stdout.write(
+                        f'{page_size:>5} rows  {action:>6}: {before * 1000:8.2f} ms -> {after * 1000:8.2f} ms '
+                        f'({len(body) / 1024:.0f} KiB)'
+                    )
+                    self.stdout.write(self.style.SUCCESS(f'{page_size:>5} rows  {action:>6} speed-up: {before / after:.1f}x'))
+            transaction.set_rollback(True)
@@ -1,40 +1,23 @@
 # backend/expenses/management/commands/create_default_categories.py
 
 from django.core.management.base import BaseCommand
+from expenses.categories import CATEGORIES
 from expenses.models import Category
 
 class Command(BaseCommand):
     help = 'Create default expense categories'
 
     def handle(self, *args, **options):
-        categories = [
-            {'name': 'Food & Dining', 'icon': '🍽️', 'color': '#FF6B6B'},
-            {'name': 'Transportation', 'icon': '🚗', 'color': '#4ECDC4'},
-            {'name': 'Shopping', 'icon': '🛍️', 'color': '#45B7D1'},
-            {'name': 'Entertainment', 'icon': '🎬', 'color': '#96CEB4'},
-            {'name': 'Healthcare', 'icon': '🏥', 'color': '#FFEAA7'},
-            {'name': 'Utilities', 'icon': '⚡', 'color': '#DDA0DD'},
-            {'name': 'Education', 'icon': '📚', 'color': '#98D8C8'},
-            {'name': 'Groceries', 'icon': '🛒', 'color': '#F7DC6F'},
-            {'name': 'Fitness', 'icon': '💪', 'color': '#BB8FCE'},
-            {'name': 'Travel', 'icon': '✈️', 'color': '#85C1E9'},
-            {'name': 'Bills & Subscriptions', 'icon': '📄', 'color': '#F8C471'},
-            {'name': 'Clothing', 'icon': '👕', 'color': '#82E0AA'},
-            {'name': 'Electronics', 'icon': '📱', 'color': '#AED6F1'},
-            {'name': 'Home & Garden', 'icon': '🏠', 'color': '#A9DFBF'},
-            {'name': 'Gifts & Donations', 'icon': '🎁', 'color': '#F1948A'},
-            {'name': 'Other', 'icon': '💰', 'color': '#D5DBDB'},
-        ]
 
         created_count = 0
         updated_count = 0
         
-        for cat_data in categories:
+        for cat_data in CATEGORIES.values():
             category, created = Category.objects.get_or_create(
-                name=cat_data["name"],
+                name=cat_data.name,
                 defaults={
-                    "icon": cat_data["icon"],
-                    "color": cat_data["color"]
+                    "icon": cat_data.icon,
+                    "color": cat_data.color
                 }
             )
             
@@ -46,11 +29,11 @@ class Command(BaseCommand):
             else:
                 # Update existing category with new icon/color if different
                 updated = False
-                if category.icon != cat_data["icon"]:
-                    category.icon = cat_data["icon"]
+                if category.icon != cat_data.icon:
+                    category.icon = cat_data.icon
                     updated = True
-                if category.color != cat_data["color"]:
-                    category.color = cat_data["color"]
+                if category.color != cat_data.color:
+                    category.color = cat_data.color
                     updated = True
                 
                 if updated:
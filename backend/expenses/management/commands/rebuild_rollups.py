@@ -0,0 +1,31 @@
+# backend/expenses/management/commands/rebuild_rollups.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from expenses.models import ExpenseRollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly expense rollup table from the Expense rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Only rebuild rollups for this username (can be repeated)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        created = ExpenseRollup.objects.rebuild(users=users, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {created} rollup rows')
+        )
@@ -1,28 +1,18 @@
 # backend/expenses/models.py - SIMPLIFIED WITH HARDCODED CATEGORIES
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Sum, Count, OuterRef, Subquery, Value
+from django.db.models.functions import TruncMonth, Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .categories import CATEGORY_CHOICES, get_category
+from .search import apply_search
+
 class Category(models.Model):
     """Keep this for backwards compatibility, but categories are now hardcoded in frontend"""
-    CATEGORY_CHOICES = [
-        ('food_dining', 'Food & Dining'),
-        ('transportation', 'Transportation'),
-        ('shopping', 'Shopping'),
-        ('entertainment', 'Entertainment'),
-        ('healthcare', 'Healthcare'),
-        ('utilities', 'Utilities'),
-        ('education', 'Education'),
-        ('groceries', 'Groceries'),
-        ('fitness', 'Fitness'),
-        ('travel', 'Travel'),
-        ('bills_subscriptions', 'Bills & Subscriptions'),
-        ('clothing', 'Clothing'),
-        ('electronics', 'Electronics'),
-        ('home_garden', 'Home & Garden'),
-        ('gifts_donations', 'Gifts & Donations'),
-        ('other', 'Other'),
-    ]
+    CATEGORY_CHOICES = list(CATEGORY_CHOICES)
     
     name = models.CharField(max_length=100, unique=True)
     icon = models.CharField(max_length=50, default='💰')
@@ -36,6 +26,11 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ExpenseQuerySet(models.QuerySet):
+    def search(self, text, ranked=False):
+        """Indexed prefix search over title/description (FTS5 on SQLite, tsvector on Postgres)"""
+        return apply_search(self, text, ranked=ranked)
+
 class Expense(models.Model):
     PAYMENT_METHODS = [
         ('cash', 'Cash'),
@@ -46,24 +41,7 @@ class Expense(models.Model):
     ]
     
     # Updated category choices - now uses string values instead of foreign key
-    CATEGORY_CHOICES = [
-        ('food_dining', 'Food & Dining'),
-        ('transportation', 'Transportation'),
-        ('shopping', 'Shopping'),
-        ('entertainment', 'Entertainment'),
-        ('healthcare', 'Healthcare'),
-        ('utilities', 'Utilities'),
-        ('education', 'Education'),
-        ('groceries', 'Groceries'),
-        ('fitness', 'Fitness'),
-        ('travel', 'Travel'),
-        ('bills_subscriptions', 'Bills & Subscriptions'),
-        ('clothing', 'Clothing'),
-        ('electronics', 'Electronics'),
-        ('home_garden', 'Home & Garden'),
-        ('gifts_donations', 'Gifts & Donations'),
-        ('other', 'Other'),
-    ]
+    CATEGORY_CHOICES = list(CATEGORY_CHOICES)
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expenses')
     # Changed from ForeignKey to CharField for categories
@@ -79,45 +57,158 @@ class Expense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ExpenseQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # List/recent/keyset pages: filter by user, walk in list order
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='expense_user_date_idx'),
+            # Category filters and budget windows: user + category, then date
+            models.Index(fields=['user', 'category', '-date', '-created_at', '-id'], name='expense_user_cat_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - ₹{self.amount}"
     
+    ROLLUP_FIELDS = ('user_id', 'date', 'category', 'payment_method', 'amount')
+    LABEL_FIELDS = ('title', 'description', 'category', 'is_ai_categorized')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so updates can move amounts between rollup rows
+        loaded = {f.attname for f in cls._meta.concrete_fields if f.attname not in instance.get_deferred_fields()}
+        if loaded.issuperset(cls.ROLLUP_FIELDS):
+            instance._rollup_state = instance.rollup_state()
+        if loaded.issuperset(cls.LABEL_FIELDS):
+            instance._label_state = instance.label_state()
+        return instance
+    
+    def rollup_state(self):
+        """(rollup key, amount) this expense contributes to ExpenseRollup"""
+        # Unsaved values may still be strings, e.g. create(date='2025-01-01')
+        date = self._meta.get_field('date').to_python(self.date)
+        amount = self._meta.get_field('amount').to_python(self.amount)
+        key = (self.user_id, date.replace(day=1), self.category, self.payment_method)
+        return key, amount
+    
+    def label_state(self):
+        """(title, description, category) when a user chose the category, else None"""
+        if self.is_ai_categorized:
+            return None
+        return self.title, self.description, self.category
+    
+    def save(self, *args, **kwargs):
+        # Keep the row and its rollup contribution in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     # Helper methods to get category display info
     def get_category_display_info(self):
-        category_info = {
-            'food_dining': {'name': 'Food & Dining', 'icon': '🍽️', 'color': '#FF6B6B'},
-            'transportation': {'name': 'Transportation', 'icon': '🚗', 'color': '#4ECDC4'},
-            'shopping': {'name': 'Shopping', 'icon': '🛍️', 'color': '#45B7D1'},
-            'entertainment': {'name': 'Entertainment', 'icon': '🎬', 'color': '#96CEB4'},
-            'healthcare': {'name': 'Healthcare', 'icon': '🏥', 'color': '#FFEAA7'},
-            'utilities': {'name': 'Utilities', 'icon': '⚡', 'color': '#DDA0DD'},
-            'education': {'name': 'Education', 'icon': '📚', 'color': '#98D8C8'},
-            'groceries': {'name': 'Groceries', 'icon': '🛒', 'color': '#F7DC6F'},
-            'fitness': {'name': 'Fitness', 'icon': '💪', 'color': '#BB8FCE'},
-            'travel': {'name': 'Travel', 'icon': '✈️', 'color': '#85C1E9'},
-            'bills_subscriptions': {'name': 'Bills & Subscriptions', 'icon': '📄', 'color': '#F8C471'},
-            'clothing': {'name': 'Clothing', 'icon': '👕', 'color': '#82E0AA'},
-            'electronics': {'name': 'Electronics', 'icon': '📱', 'color': '#AED6F1'},
-            'home_garden': {'name': 'Home & Garden', 'icon': '🏠', 'color': '#A9DFBF'},
-            'gifts_donations': {'name': 'Gifts & Donations', 'icon': '🎁', 'color': '#F1948A'},
-            'other': {'name': 'Other', 'icon': '💰', 'color': '#D5DBDB'},
-        }
-        return category_info.get(self.category, category_info['other'])
+        return get_category(self.category).display_info()
     
     @property
     def category_name(self):
-        return self.get_category_display_info()['name']
+        return get_category(self.category).name
     
     @property
     def category_icon(self):
-        return self.get_category_display_info()['icon']
+        return get_category(self.category).icon
     
     @property
     def category_color(self):
-        return self.get_category_display_info()['color']
+        return get_category(self.category).color
+
+class ExpenseRollupManager(models.Manager):
+    """
+    Rollups follow Expense save()/delete() through signals. QuerySet.update(),
+    bulk_update() and bulk_create() send no signals, so callers that write
+    expenses that way must pass the change to apply_many() (or run rebuild()).
+    """
+    
+    def apply(self, key, amount, count):
+        """Add `amount`/`count` to the rollup row for `key`, creating it if needed"""
+        user_id, month, category, payment_method = key
+        lookup = self.filter(
+            user_id=user_id, month=month, category=category, payment_method=payment_method
+        )
+        updated = lookup.update(total=F('total') + amount, count=F('count') + count)
+        if count < 0:
+            lookup.filter(count__lte=0).delete()
+        elif not updated:
+            try:
+                with transaction.atomic():
+                    self.create(
+                        user_id=user_id, month=month, category=category,
+                        payment_method=payment_method, total=amount, count=count
+                    )
+            except IntegrityError:
+                # Another writer created the row first
+                lookup.update(total=F('total') + amount, count=F('count') + count)
+    
+    def apply_many(self, deltas):
+        """Apply a {key: (amount, count)} mapping, e.g. after a bulk insert"""
+        with transaction.atomic():
+            for key, (amount, count) in deltas.items():
+                if count:
+                    self.apply(key, amount, count)
+    
+    def rebuild(self, users=None, batch_size=1000):
+        """Recompute rollups from Expense with one GROUP BY and bulk inserts"""
+        expenses = Expense.objects.all()
+        rollups = self.all()
+        if users is not None:
+            expenses = expenses.filter(user__in=users)
+            rollups = rollups.filter(user__in=users)
+        
+        rows = (
+            expenses.annotate(month=TruncMonth('date'))
+            .values('user_id', 'month', 'category', 'payment_method')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by()
+        )
+        with transaction.atomic():
+            rollups.delete()
+            created = self.bulk_create(
+                (self.model(**row) for row in rows.iterator()),
+                batch_size=batch_size
+            )
+        return len(created)
+
+class ExpenseRollup(models.Model):
+    """Per-user monthly totals, maintained incrementally on every Expense write"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_rollups')
+    month = models.DateField()  # first day of the month
+    category = models.CharField(max_length=50, choices=Expense.CATEGORY_CHOICES)
+    payment_method = models.CharField(max_length=20, choices=Expense.PAYMENT_METHODS)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    
+    objects = ExpenseRollupManager()
+    
+    class Meta:
+        unique_together = ['user', 'month', 'category', 'payment_method']
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.month:%Y-%m} - {self.category} - ₹{self.total}"
+
+class BudgetQuerySet(models.QuerySet):
+    def with_spent_amount(self):
+        """Annotate each budget's spending so a whole list costs one query"""
+        spent = Expense.objects.filter(
+            user_id=OuterRef('user_id'),
+            category=OuterRef('category'),
+            date__gte=OuterRef('start_date'),
+            date__lte=OuterRef('end_date')
+        ).order_by().values('user_id').annotate(total=Sum('amount')).values('total')
+        
+        amount_field = models.DecimalField(max_digits=12, decimal_places=2)
+        return self.annotate(spent_total=Coalesce(
+            Subquery(spent, output_field=amount_field),
+            Value(0, output_field=amount_field)
+        ))
 
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
@@ -134,17 +225,43 @@ class Budget(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = BudgetQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'category', 'period']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='budget_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.get_category_display()} - ₹{self.amount}/{self.period}"
     
+    def save(self, *args, **kwargs):
+        # The window or category may have changed, so drop any precomputed spending
+        self.__dict__.pop('spent_total', None)
+        super().save(*args, **kwargs)
+    
     @property
     def spent_amount(self):
+        # Use the with_spent_amount() annotation or the value computed earlier
+        if 'spent_total' not in self.__dict__:
+            self.spent_total = self._compute_spent_amount()
+        return self.spent_total
+    
+    def _compute_spent_amount(self):
+        # Whole-month windows can be answered from the rollup table
+        if self.start_date.day == 1 and (self.end_date + timedelta(days=1)).day == 1:
+            return ExpenseRollup.objects.filter(
+                user_id=self.user_id,
+                category=self.category,
+                month__range=[self.start_date, self.end_date]
+            ).aggregate(
+                total=models.Sum('total')
+            )['total'] or 0
+        
         return Expense.objects.filter(
-            user=self.user,
+            user_id=self.user_id,
             category=self.category,
             date__range=[self.start_date, self.end_date]
         ).aggregate(
@@ -162,26 +279,8 @@ class Budget(models.Model):
         return min((self.spent_amount / self.amount) * 100, 100)
     
     def get_category_display_info(self):
-        category_info = {
-            'food_dining': {'name': 'Food & Dining', 'icon': '🍽️', 'color': '#FF6B6B'},
-            'transportation': {'name': 'Transportation', 'icon': '🚗', 'color': '#4ECDC4'},
-            'shopping': {'name': 'Shopping', 'icon': '🛍️', 'color': '#45B7D1'},
-            'entertainment': {'name': 'Entertainment', 'icon': '🎬', 'color': '#96CEB4'},
-            'healthcare': {'name': 'Healthcare', 'icon': '🏥', 'color': '#FFEAA7'},
-            'utilities': {'name': 'Utilities', 'icon': '⚡', 'color': '#DDA0DD'},
-            'education': {'name': 'Education', 'icon': '📚', 'color': '#98D8C8'},
-            'groceries': {'name': 'Groceries', 'icon': '🛒', 'color': '#F7DC6F'},
-            'fitness': {'name': 'Fitness', 'icon': '💪', 'color': '#BB8FCE'},
-            'travel': {'name': 'Travel', 'icon': '✈️', 'color': '#85C1E9'},
-            'bills_subscriptions': {'name': 'Bills & Subscriptions', 'icon': '📄', 'color': '#F8C471'},
-            'clothing': {'name': 'Clothing', 'icon': '👕', 'color': '#82E0AA'},
-            'electronics': {'name': 'Electronics', 'icon': '📱', 'color': '#AED6F1'},
-            'home_garden': {'name': 'Home & Garden', 'icon': '🏠', 'color': '#A9DFBF'},
-            'gifts_donations': {'name': 'Gifts & Donations', 'icon': '🎁', 'color': '#F1948A'},
-            'other': {'name': 'Other', 'icon': '💰', 'color': '#D5DBDB'},
-        }
-        return category_info.get(self.category, category_info['other'])
+        return get_category(self.category).display_info()
     
     @property
     def category_name(self):
-        return self.get_category_display_info()['name']
\ No newline at end of file
+        return get_category(self.category).name
\ No newline at end of file
@@ -0,0 +1,105 @@
+# backend/expenses/pagination.py - KEYSET PAGINATION FOR LARGE EXPENSE LISTS
+import base64
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ExpenseKeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over (-date, -created_at, -id).
+
+    Each page seeks past the last row of the previous one instead of using
+    OFFSET, and the total COUNT(*) is only run when `include_count` is set,
+    so page N costs the same as page 1.
+    """
+    page_size = 20
+    max_page_size = 1000
+    page_size_query_params = ('page_size', 'limit')
+    cursor_query_param = 'cursor'
+    count_query_param = 'include_count'
+    ordering = ('-date', '-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            last_date, last_created_at, last_id = position
+            queryset = queryset.filter(
+                Q(date__lt=last_date) |
+                Q(date=last_date, created_at__lt=last_created_at) |
+                Q(date=last_date, created_at=last_created_at, id__lt=last_id)
+            )
+
+        # Fetch one extra row to learn whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.last = results[-1] if results else None
+        return results
+
+    def get_page_size(self, request):
+        for param in self.page_size_query_params:
+            try:
+                size = int(request.query_params[param])
+            except (KeyError, ValueError):
+                continue
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            last_date, last_created_at, last_id = raw.split('|')
+            return date.fromisoformat(last_date), datetime.fromisoformat(last_created_at), int(last_id)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, expense):
+        raw = f'{expense.date.isoformat()}|{expense.created_at.isoformat()}|{expense.id}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('page_size', self.page_size),
+        ])
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,111 @@
+# backend/expenses/receipts.py - CONTENT-ADDRESSED RECEIPT IMAGE STORAGE
+"""
+Receipt uploads are transcoded to WebP and stored once per user and image:
+
+    receipts/<user id>/<sha256[:2]>/<sha256>.webp          capped at MAX_SIDE / MAX_BYTES
+    receipts/<user id>/<sha256[:2]>/<sha256>_thumb.webp    THUMBNAIL_SIDE, for list views
+
+The hash is taken over the uploaded bytes, so uploading the same photo
+again (e.g. after scanning it) reuses the stored copy. Only names in this
+layout are ever deleted; uploads from before it (receipts/<file>) are left
+alone, since nothing tracks who else may refer to them.
+"""
+import hashlib
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+MAX_SIDE = 2000
+MAX_BYTES = 400 * 1024
+THUMBNAIL_SIDE = 320
+WEBP_QUALITY = 80
+MIN_WEBP_QUALITY = 40
+THUMBNAIL_SUFFIX = '_thumb.webp'
+
+
+def read_upload(upload):
+    """Bytes of an uploaded file, whether held in memory or spooled to disk by Django"""
+    upload.seek(0)
+    data = upload.read()
+    upload.seek(0)
+    return data
+
+
+def receipt_name(user_id, digest):
+    return f'receipts/{user_id}/{digest[:2]}/{digest}.webp'
+
+
+def is_content_addressed(user_id, name):
+    """Whether `name` is a receipt_name() of this user (image or thumbnail)"""
+    pattern = rf'receipts/{int(user_id)}/([0-9a-f]{{2}})/\1[0-9a-f]{{62}}(_thumb)?\.webp'
+    return bool(name and re.fullmatch(pattern, name))
+
+
+def thumbnail_name(name):
+    """Thumbnail path for a stored receipt, or None for legacy (non content-addressed) files"""
+    if not name or not name.endswith('.webp') or name.endswith(THUMBNAIL_SUFFIX):
+        return None
+    return name[:-len('.webp')] + THUMBNAIL_SUFFIX
+
+
+def _encode_webp(image, max_side, max_bytes=None):
+    image = image.copy()
+    image.thumbnail((max_side, max_side))
+    quality = WEBP_QUALITY
+    while True:
+        buffer = BytesIO()
+        image.save(buffer, format='WEBP', quality=quality, method=4)
+        if max_bytes is None or buffer.tell() <= max_bytes:
+            return buffer.getvalue()
+        if quality > MIN_WEBP_QUALITY:
+            quality -= 10
+        else:
+            # Still too big at the lowest quality we accept: shrink instead
+            image.thumbnail((int(max(image.size) * 0.75),) * 2)
+
+
+def _save_as(storage, name, content):
+    """
+    Save `content` under exactly `name`. If a concurrent upload of the same
+    image wrote it first, storage picks a suffixed name instead; drop that
+    copy and keep the existing one, which holds the same bytes.
+    """
+    saved = storage.save(name, content)
+    if saved != name:
+        storage.delete(saved)
+    return name
+
+
+def store_receipt(user, upload, storage=None):
+    """
+    Store `upload` for `user` and return the stored name. An image the user
+    has uploaded before is not written again.
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    data = read_upload(upload)
+    name = receipt_name(user.pk, hashlib.sha256(data).hexdigest())
+    if storage.exists(name):
+        return name
+
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    _save_as(storage, thumbnail_name(name), ContentFile(_encode_webp(image, THUMBNAIL_SIDE)))
+    return _save_as(storage, name, ContentFile(_encode_webp(image, MAX_SIDE, MAX_BYTES)))
+
+
+def delete_receipt(user_id, name, storage=None):
+    """Delete a stored receipt and its thumbnail unless another expense still uses it"""
+    from .models import Expense
+
+    storage = storage or default_storage
+    if not is_content_addressed(user_id, name) or Expense.objects.filter(user_id=user_id, receipt_image=name).exists():
+        return
+    for path in (name, thumbnail_name(name)):
+        if path and storage.exists(path):
+            storage.delete(path)
@@ -0,0 +1,79 @@
+# backend/expenses/search.py - INDEXED FULL-TEXT SEARCH OVER EXPENSE TITLES/DESCRIPTIONS
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# SQLite: FTS5 external-content table kept in sync by triggers (see migration 0006)
+FTS_TABLE = 'expenses_expense_fts'
+
+# Postgres: must match the expression of the GIN index created in migration 0006
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(\"expenses_expense\".\"title\", '') "
+    "|| ' ' || coalesce(\"expenses_expense\".\"description\", ''))"
+)
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+MAX_SEARCH_TERMS = 8
+
+_fts_ready = {}
+
+
+def search_terms(text):
+    """Split a free-text query into lowercase word terms"""
+    return TERM_RE.findall((text or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def sqlite_fts_ready(connection):
+    """Whether the FTS5 table exists on this connection (checked once per alias)"""
+    if connection.alias not in _fts_ready:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+            )
+            _fts_ready[connection.alias] = cursor.fetchone() is not None
+    return _fts_ready[connection.alias]
+
+
+def apply_search(queryset, text, ranked=False):
+    """
+    Filter `queryset` to expenses whose title or description contains every
+    term as a word prefix. With `ranked`, also annotate `search_rank`
+    (higher is more relevant).
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite' and sqlite_fts_ready(connection):
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = "expenses_expense"."id"',
+                [match], output_field=FloatField()
+            ))
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        queryset = queryset.filter(RawSQL(
+            f"{SEARCH_VECTOR_SQL} @@ to_tsquery('simple', %s)", [tsquery],
+            output_field=BooleanField()
+        ))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"ts_rank({SEARCH_VECTOR_SQL}, to_tsquery('simple', %s))", [tsquery],
+                output_field=FloatField()
+            ))
+        return queryset
+
+    # Other backends: unindexed substring match
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    return queryset
@@ -1,6 +1,12 @@
 # backend/expenses/serializers.py - SIMPLIFIED FOR HARDCODED CATEGORIES
+import copy
+
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
+from .categories import CATEGORY_SLUGS, get_category
 from .models import Category, Expense, Budget
+from .receipts import delete_receipt, store_receipt, thumbnail_name
 
 class CategorySerializer(serializers.ModelSerializer):
     """Keep for backwards compatibility but not used with hardcoded categories"""
@@ -27,30 +33,30 @@ class CategorySerializer(serializers.ModelSerializer):
         return 0
 
 class ExpenseSerializer(serializers.ModelSerializer):
-    # Use SerializerMethodField to get category display info
-    category_name = serializers.SerializerMethodField()
-    category_icon = serializers.SerializerMethodField()
-    category_color = serializers.SerializerMethodField()
+    # Category display info comes from the registry (expenses/categories.py)
+    category_name = serializers.ReadOnlyField()
+    category_icon = serializers.ReadOnlyField()
+    category_color = serializers.ReadOnlyField()
     receipt_image = serializers.ImageField(required=False, allow_null=True)
+    receipt_thumbnail = serializers.SerializerMethodField()
     
     class Meta:
         model = Expense
         fields = [
             'id', 'title', 'description', 'amount', 'payment_method',
-            'date', 'receipt_image', 'is_recurring', 'is_ai_categorized',
+            'date', 'receipt_image', 'receipt_thumbnail', 'is_recurring', 'is_ai_categorized',
             'category', 'category_name', 'category_icon', 'category_color',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['user', 'is_ai_categorized', 'created_at', 'updated_at']
     
-    def get_category_name(self, obj):
-        return obj.category_name
-    
-    def get_category_icon(self, obj):
-        return obj.category_icon
-    
-    def get_category_color(self, obj):
-        return obj.category_color
+    def get_receipt_thumbnail(self, obj):
+        name = thumbnail_name(obj.receipt_image.name if obj.receipt_image else None)
+        if not name:
+            return None
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
     
     def validate_amount(self, value):
         """Validate that amount is positive"""
@@ -60,8 +66,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
     
     def validate_category(self, value):
         """Validate that category is in allowed choices"""
-        valid_categories = [choice[0] for choice in Expense.CATEGORY_CHOICES]
-        if value not in valid_categories:
+        if value not in CATEGORY_SLUGS:
             raise serializers.ValidationError("Invalid category selected")
         return value
     
@@ -71,6 +76,8 @@ class ExpenseSerializer(serializers.ModelSerializer):
             validated_data.pop('receipt_image')
         
         validated_data['user'] = self.context['request'].user
+        if validated_data.get('receipt_image'):
+            validated_data['receipt_image'] = store_receipt(validated_data['user'], validated_data['receipt_image'])
         return super().create(validated_data)
     
     def update(self, instance, validated_data):
@@ -78,10 +85,89 @@ class ExpenseSerializer(serializers.ModelSerializer):
         if 'receipt_image' in validated_data and not validated_data['receipt_image']:
             validated_data.pop('receipt_image')
         
-        return super().update(instance, validated_data)
+        # Changing a suggested category is a correction; the user now owns the label
+        if 'category' in validated_data and validated_data['category'] != instance.category:
+            validated_data['is_ai_categorized'] = False
+        
+        previous_receipt = instance.receipt_image.name if instance.receipt_image else None
+        if validated_data.get('receipt_image'):
+            validated_data['receipt_image'] = store_receipt(instance.user, validated_data['receipt_image'])
+        
+        expense = super().update(instance, validated_data)
+        if previous_receipt and previous_receipt != (expense.receipt_image.name if expense.receipt_image else None):
+            # Only once the new name is committed; a rollback keeps the old one
+            transaction.on_commit(lambda: delete_receipt(expense.user_id, previous_receipt))
+        return expense
+
+class ExpenseRowSerializer:
+    """
+    Read-only fast path for expense lists. Builds exactly what
+    ExpenseSerializer(many=True).data would from values_list() rows, without
+    instantiating models or dispatching through a serializer per field.
+    Keep COLUMNS and serialize() in step with ExpenseSerializer.Meta.fields.
+    """
+    COLUMNS = (
+        'id', 'title', 'description', 'amount', 'payment_method', 'date', 'receipt_image',
+        'is_recurring', 'is_ai_categorized', 'category', 'created_at', 'updated_at',
+    )
+    _fields = None
+    
+    def __init__(self, context=None):
+        self.context = context or {}
+    
+    @classmethod
+    def rows(cls, queryset):
+        """Named rows (attribute access keeps keyset pagination working)"""
+        return queryset.values_list(*cls.COLUMNS, named=True)
+    
+    @classmethod
+    def formatting_fields(cls):
+        # ExpenseSerializer's own fields format amounts, dates and timestamps
+        if cls._fields is None:
+            cls._fields = ExpenseSerializer().fields
+        return cls._fields
+    
+    def serialize(self, rows):
+        fields = self.formatting_fields()
+        amount = fields['amount'].to_representation
+        day = fields['date'].to_representation
+        # Resolve the active timezone once per page instead of once per timestamp
+        timestamp_field = copy.copy(fields['created_at'])
+        timestamp_field.timezone = timestamp_field.default_timezone()
+        timestamp = timestamp_field.to_representation
+        request = self.context.get('request')
+        
+        def file_url(name):
+            if not name:
+                return None
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+        
+        data = []
+        for row in rows:
+            category = get_category(row.category)
+            data.append({
+                'id': row.id,
+                'title': row.title,
+                'description': row.description,
+                'amount': amount(row.amount),
+                'payment_method': row.payment_method,
+                'date': day(row.date),
+                'receipt_image': file_url(row.receipt_image),
+                'receipt_thumbnail': file_url(thumbnail_name(row.receipt_image)),
+                'is_recurring': row.is_recurring,
+                'is_ai_categorized': row.is_ai_categorized,
+                'category': row.category,
+                'category_name': category.name,
+                'category_icon': category.icon,
+                'category_color': category.color,
+                'created_at': timestamp(row.created_at),
+                'updated_at': timestamp(row.updated_at),
+            })
+        return data
 
 class BudgetSerializer(serializers.ModelSerializer):
-    category_name = serializers.SerializerMethodField()
+    category_name = serializers.ReadOnlyField()
     spent_amount = serializers.ReadOnlyField()
     remaining_amount = serializers.ReadOnlyField()
     progress_percentage = serializers.ReadOnlyField()
@@ -95,13 +181,9 @@ class BudgetSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'created_at']
     
-    def get_category_name(self, obj):
-        return obj.category_name
-    
     def validate_category(self, value):
         """Validate that category is in allowed choices"""
-        valid_categories = [choice[0] for choice in Expense.CATEGORY_CHOICES]
-        if value not in valid_categories:
+        if value not in CATEGORY_SLUGS:
             raise serializers.ValidationError("Invalid category selected")
         return value
     
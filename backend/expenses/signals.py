@@ -0,0 +1,54 @@
+# backend/expenses/signals.py - KEEP DERIVED TABLES IN SYNC WITH EXPENSE WRITES
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_data_version
+from .models import Budget, Expense, ExpenseRollup
+from .receipts import delete_receipt
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_rollup_state(sender, instance, raw=False, **kwargs):
+    """Load the stored state for instances that were not fetched from the DB"""
+    if raw or instance._state.adding or hasattr(instance, '_rollup_state'):
+        return
+    previous = Expense.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_state = previous.rollup_state()
+
+
+@receiver(post_save, sender=Expense)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_rollup_state', None)
+    new = instance.rollup_state()
+    
+    if old != new:
+        if old is not None:
+            ExpenseRollup.objects.apply(old[0], -old[1], -1)
+        ExpenseRollup.objects.apply(new[0], new[1], 1)
+    instance._rollup_state = new
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    key, amount = getattr(instance, '_rollup_state', None) or instance.rollup_state()
+    ExpenseRollup.objects.apply(key, -amount, -1)
+    instance.__dict__.pop('_rollup_state', None)
+
+
+@receiver(post_delete, sender=Expense)
+def delete_unused_receipt(sender, instance, **kwargs):
+    if instance.receipt_image:
+        name = instance.receipt_image.name
+        transaction.on_commit(lambda: delete_receipt(instance.user_id, name))
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_cached_analytics(sender, instance, **kwargs):
+    bump_data_version(instance.user_id)
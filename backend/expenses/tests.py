@@ -1,3 +1,942 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .analytics import add_months, month_buckets
+from .cache import get_cache, stats as cache_stats
+from .categories import CATEGORIES
+from .columnar import msgpack
+from .models import Expense, ExpenseRollup, Budget
+from .serializers import ExpenseRowSerializer, ExpenseSerializer
+
+# The project default is no cache unless CACHE_URL is set; a test run is a single process
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class MonthBucketTests(TestCase):
+    def test_add_months_crosses_year_boundaries(self):
+        self.assertEqual(add_months(date(2025, 1, 31), -1), date(2024, 12, 1))
+        self.assertEqual(add_months(date(2025, 11, 15), 3), date(2026, 2, 1))
+
+    def test_month_buckets_are_consecutive_calendar_months(self):
+        buckets = month_buckets(6, today=date(2025, 3, 31))
+        self.assertEqual(buckets, [
+            date(2024, 10, 1), date(2024, 11, 1), date(2024, 12, 1),
+            date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1),
+        ])
+
+
+class ExpenseRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bob', password='pass12345')
+        self.expense = Expense.objects.create(
+            user=self.user, title='Lunch', amount=Decimal('120.00'),
+            category='food_dining', payment_method='upi', date=date(2025, 5, 10),
+        )
+
+    def rollups(self):
+        return list(ExpenseRollup.objects.filter(user=self.user).order_by('month', 'category').values_list(
+            'month', 'category', 'payment_method', 'total', 'count'
+        ))
+
+    def test_create_adds_to_rollup(self):
+        Expense.objects.create(
+            user=self.user, title='Dinner', amount=Decimal('80.00'),
+            category='food_dining', payment_method='upi', date=date(2025, 5, 20),
+        )
+        self.assertEqual(self.rollups(), [
+            (date(2025, 5, 1), 'food_dining', 'upi', Decimal('200.00'), 2),
+        ])
+
+    def test_update_moves_amount_between_rollups(self):
+        expense = Expense.objects.get(pk=self.expense.pk)
+        expense.category = 'travel'
+        expense.date = date(2025, 6, 2)
+        expense.amount = Decimal('150.00')
+        expense.save()
+        self.assertEqual(self.rollups(), [
+            (date(2025, 6, 1), 'travel', 'upi', Decimal('150.00'), 1),
+        ])
+
+    def test_create_with_string_values(self):
+        Expense.objects.create(
+            user=self.user, title='Dinner', amount='80.00',
+            category='food_dining', payment_method='upi', date='2025-05-20',
+        )
+        self.assertEqual(self.rollups(), [
+            (date(2025, 5, 1), 'food_dining', 'upi', Decimal('200.00'), 2),
+        ])
+
+    def test_delete_removes_rollup(self):
+        self.expense.delete()
+        self.assertEqual(self.rollups(), [])
+
+    def test_rebuild_command_matches_incremental_rollups(self):
+        expected = self.rollups()
+        ExpenseRollup.objects.all().delete()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), expected)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExpenseStatsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def add_expense(self, amount, category='other', day=None):
+        return Expense.objects.create(
+            user=self.user, title='Expense', amount=Decimal(amount),
+            category=category, date=day or timezone.localdate(),
+        )
+
+    def test_stats_totals_and_breakdown(self):
+        self.add_expense('100.00', 'food_dining')
+        self.add_expense('50.00', 'food_dining')
+        self.add_expense('30.00', 'travel')
+
+        response = self.client.get('/api/expenses/expenses/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['total_expenses']), Decimal('180.00'))
+        self.assertEqual(response.data['total_transactions'], 3)
+        self.assertEqual(Decimal(response.data['avg_transaction']), Decimal('60.00'))
+        self.assertEqual(response.data['top_category'], 'Food & Dining')
+        breakdown = response.data['category_breakdown']
+        self.assertEqual([item['category__name'] for item in breakdown], ['Food & Dining', 'Travel'])
+        self.assertEqual(breakdown[0]['count'], 2)
+        self.assertEqual(len(response.data['monthly_trend']), 6)
+        self.assertEqual(response.data['monthly_trend'][-1]['amount'], 180.0)
+
+    def test_stats_query_count_is_constant(self):
+        for months_ago in range(24):
+            self.add_expense('10.00', 'shopping', add_months(timezone.localdate(), -months_ago))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/expenses/expenses/stats/', {'months': 24})
+
+        self.assertEqual(len(response.data['monthly_trend']), 24)
+        self.assertTrue(all(item['amount'] == 10.0 for item in response.data['monthly_trend']))
+
+    def test_stats_rejects_invalid_months(self):
+        response = self.client.get('/api/expenses/expenses/stats/', {'months': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BudgetProgressTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dave', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+
+    def add_budgets(self, categories):
+        for category in categories:
+            Budget.objects.create(
+                user=self.user, category=category, amount=Decimal('100.00'),
+                start_date=self.today.replace(day=1), end_date=self.today,
+            )
+            Expense.objects.create(
+                user=self.user, title='Spend', amount=Decimal('90.00'),
+                category=category, date=self.today,
+            )
+
+    def test_list_reports_spent_amounts(self):
+        self.add_budgets(['travel'])
+
+        response = self.client.get('/api/expenses/budgets/')
+
+        budget = response.data['results'][0]
+        self.assertEqual(Decimal(str(budget['spent_amount'])), Decimal('90.00'))
+        self.assertEqual(Decimal(str(budget['remaining_amount'])), Decimal('10.00'))
+        self.assertEqual(Decimal(str(budget['progress_percentage'])), Decimal('90'))
+
+    def test_query_count_does_not_grow_with_budgets(self):
+        categories = [slug for slug, _ in Expense.CATEGORY_CHOICES]
+        self.add_budgets(categories[:1])
+        with self.assertNumQueries(2):  # page count + annotated list
+            self.client.get('/api/expenses/budgets/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/expenses/budgets/alerts/')
+
+        self.add_budgets(categories[1:10])
+        with self.assertNumQueries(2):
+            self.client.get('/api/expenses/budgets/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/expenses/budgets/alerts/')
+        self.assertEqual(len(response.data), 10)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHE)
+class AnalyticsCacheTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        cache_stats.reset()
+        self.user = User.objects.create_user(username='erin', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+        Expense.objects.create(
+            user=self.user, title='Lunch', amount=Decimal('40.00'), category='food_dining', date=self.today
+        )
+
+    def test_repeated_dashboard_loads_run_no_queries(self):
+        urls = [
+            '/api/expenses/expenses/stats/',
+            '/api/expenses/budgets/alerts/',
+            '/api/ai/insights/',
+            '/api/ai/recommendations/',
+        ]
+        first = [self.client.get(url) for url in urls]
+
+        with self.assertNumQueries(0):
+            second = [self.client.get(url) for url in urls]
+
+        self.assertEqual([response['X-Cache'] for response in first], ['MISS'] * 4)
+        self.assertEqual([response['X-Cache'] for response in second], ['HIT'] * 4)
+        self.assertEqual([response.data for response in second], [response.data for response in first])
+        self.assertEqual(cache_stats.snapshot()['stats'], {'hits': 1, 'misses': 1})
+
+    def test_expense_and_budget_writes_invalidate(self):
+        self.client.get('/api/expenses/expenses/stats/')
+        self.client.post('/api/expenses/expenses/', {
+            'title': 'Dinner', 'amount': '60.00', 'category': 'food_dining', 'date': self.today.isoformat(),
+        })
+
+        response = self.client.get('/api/expenses/expenses/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(Decimal(response.data['total_expenses']), Decimal('100.00'))
+
+        self.assertEqual(self.client.get('/api/expenses/budgets/alerts/').data, [])
+        Budget.objects.create(
+            user=self.user, category='food_dining', amount=Decimal('100.00'),
+            start_date=self.today.replace(day=1), end_date=self.today,
+        )
+        self.assertEqual(len(self.client.get('/api/expenses/budgets/alerts/').data), 1)
+
+    def test_months_parameter_is_part_of_the_key(self):
+        self.client.get('/api/expenses/expenses/stats/', {'months': 3})
+        response = self.client.get('/api/expenses/expenses/stats/', {'months': 12})
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['monthly_trend']), 12)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHE)
+class DashboardTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='kim', password='pass12345')
+        self.client.force_authenticate(self.user)
+        today = timezone.localdate()
+        for amount, category in [('40.00', 'food_dining'), ('950.00', 'travel'), ('60.00', 'travel')]:
+            Expense.objects.create(user=self.user, title='Spend', amount=Decimal(amount), category=category, date=today)
+        Budget.objects.create(
+            user=self.user, category='travel', amount=Decimal('1000.00'),
+            start_date=today.replace(day=1), end_date=add_months(today, 1) - timedelta(days=1),
+        )
+
+    def test_sections_match_the_standalone_endpoints(self):
+        with self.assertNumQueries(4):  # rollups, small-transaction count, budgets, recent
+            dashboard = self.client.get('/api/expenses/dashboard/').json()
+
+        get_cache().clear()
+        self.assertEqual(dashboard['stats'], self.client.get('/api/expenses/expenses/stats/').json())
+        self.assertEqual(dashboard['recent'], self.client.get('/api/expenses/expenses/recent/').json())
+        self.assertEqual(dashboard['alerts'], self.client.get('/api/expenses/budgets/alerts/').json())
+        self.assertEqual(
+            dashboard['insights']['insights'], self.client.get('/api/ai/insights/').json()['insights']
+        )
+        self.assertEqual(dashboard['alerts'][0]['type'], 'danger')
+
+    def test_warm_dashboard_only_queries_recent_expenses(self):
+        self.client.get('/api/expenses/expenses/stats/')
+        self.client.get('/api/expenses/budgets/alerts/')
+        self.client.get('/api/ai/insights/')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/expenses/dashboard/')
+        self.assertEqual(set(response.data), {'stats', 'recent', 'alerts', 'insights'})
+
+    def test_sections_selector(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/expenses/dashboard/?sections=stats')
+        self.assertEqual(list(response.data), ['stats'])
+        self.assertEqual(self.client.get('/api/expenses/dashboard/?sections=stats,budgets').status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(APITestCase):
+    list_urls = (
+        '/api/expenses/expenses/', '/api/expenses/expenses/recent/',
+        '/api/expenses/budgets/', '/api/expenses/dashboard/',
+    )
+    urls = list_urls + (
+        '/api/expenses/expenses/stats/', '/api/expenses/budgets/alerts/',
+        '/api/ai/insights/', '/api/ai/recommendations/',
+    )
+
+    def setUp(self):
+        # Two workers sharing one file cache directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.use_caches({
+            alias: {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name}
+            for alias in ('default', 'other_worker')
+        })
+        self.user = User.objects.create_user(username='frank', password='pass12345')
+        self.client.force_authenticate(self.user)
+        Expense.objects.create(
+            user=self.user, title='Taxi', amount=Decimal('250.00'), category='transportation',
+            date=timezone.localdate(),
+        )
+
+    def use_caches(self, caches):
+        override = self.settings(CACHES=caches)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def add_expense_on(self, alias):
+        with self.settings(ANALYTICS_CACHE_ALIAS=alias):
+            Expense.objects.create(
+                user=self.user, title='Bus', amount=Decimal('20.00'), category='transportation',
+                date=timezone.localdate(),
+            )
+
+    def test_unchanged_data_is_answered_304_without_queries(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['ETag'].startswith('W/"'))
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            with self.assertNumQueries(0):
+                revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_writes_make_lists_return_200(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.list_urls}
+
+        self.client.post('/api/expenses/expenses/', {
+            'title': 'Bus', 'amount': '20.00', 'category': 'transportation',
+            'date': timezone.localdate().isoformat(),
+        })
+
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        listed = self.client.get('/api/expenses/expenses/').json()['results']
+        self.assertEqual([expense['title'] for expense in listed], ['Bus', 'Taxi'])
+
+    def test_write_on_another_worker_changes_the_etag(self):
+        etag = self.client.get('/api/expenses/expenses/stats/')['ETag']
+
+        self.add_expense_on('other_worker')
+
+        response = self.client.get('/api/expenses/expenses/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_transactions'], 2)
+
+    def test_per_process_caches_disable_conditional_get(self):
+        self.use_caches({
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+            for alias in ('default', 'other_worker')
+        })
+        self.client.get('/api/expenses/expenses/stats/')
+
+        self.add_expense_on('other_worker')
+
+        # This worker never saw the write; it must not confirm anything the client holds
+        for url in self.urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('ETag', response)
+
+    def test_writes_and_other_parameters_change_the_etag(self):
+        etag = self.client.get('/api/expenses/expenses/stats/')['ETag']
+
+        other_window = self.client.get('/api/expenses/expenses/stats/', {'months': 12}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other_window.status_code, 200)
+
+        Expense.objects.create(
+            user=self.user, title='Bus', amount=Decimal('20.00'), category='transportation',
+            date=timezone.localdate(),
+        )
+        response = self.client.get('/api/expenses/expenses/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_transactions'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class CategoryRegistryTests(TestCase):
+    def test_registry_backs_model_choices_and_display_info(self):
+        self.assertEqual([slug for slug, _ in Expense.CATEGORY_CHOICES], list(CATEGORIES))
+        self.assertEqual(
+            Expense(category='travel').get_category_display_info(),
+            {'name': 'Travel', 'icon': '✈️', 'color': '#85C1E9'}
+        )
+        self.assertEqual(Budget(category='unknown').category_name, 'Other')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExpenseRowSerializerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='heidi', password='pass12345')
+        self.client.force_authenticate(self.user)
+        Expense.objects.create(
+            user=self.user, title='Groceries', description=None, amount=Decimal('1234.5'),
+            category='groceries', date=date(2025, 3, 9), is_ai_categorized=True,
+        )
+        Expense.objects.create(
+            user=self.user, title='Flight', description='BLR-DEL', amount=Decimal('5600.00'),
+            category='travel', payment_method='card', date=date(2025, 3, 10),
+            receipt_image=f'receipts/{self.user.pk}/ab/{"ab" * 32}.webp',
+        )
+
+    def test_matches_expense_serializer_output(self):
+        request = APIRequestFactory().get('/api/expenses/expenses/')
+        queryset = Expense.objects.filter(user=self.user).order_by('-date')
+
+        expected = ExpenseSerializer(queryset, many=True, context={'request': request}).data
+        actual = ExpenseRowSerializer(context={'request': request}).serialize(ExpenseRowSerializer.rows(queryset))
+
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+        self.assertTrue(actual[0]['receipt_thumbnail'].endswith('_thumb.webp'))
+
+    def test_list_and_recent_use_the_fast_path(self):
+        with mock.patch.object(Expense, 'from_db', side_effect=AssertionError('model instantiated')):
+            listed = self.client.get('/api/expenses/expenses/')
+            recent = self.client.get('/api/expenses/expenses/recent/')
+
+        self.assertEqual([item['title'] for item in listed.data['results']], ['Flight', 'Groceries'])
+        self.assertEqual(recent.data, listed.data['results'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ColumnarFormatTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='ivy', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+        for offset, amount, category in [(0, '249.50', 'food_dining'), (0, '12.00', 'groceries'), (4, '899.00', 'food_dining')]:
+            Expense.objects.create(
+                user=self.user, title=f'Spend {amount}', amount=Decimal(amount), category=category,
+                date=self.today - timedelta(days=offset),
+            )
+
+    def test_list_columns(self):
+        response = self.client.get('/api/expenses/expenses/?format=columnar')
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.expenses.columnar+json')
+        self.assertIn('Accept', response['Vary'])
+        columns = json.loads(response.content)['results']
+        self.assertEqual(columns['origin'], (self.today - timedelta(days=4)).isoformat())
+        self.assertEqual(columns['date'], [4, 4, 0])
+        self.assertEqual(sorted(columns['amount']), [1200, 24950, 89900])
+        self.assertEqual(columns['category'][-1], CATEGORIES['food_dining'].id)
+
+    def test_stats_and_timeseries_match_json_values(self):
+        stats = self.client.get('/api/expenses/expenses/stats/', HTTP_ACCEPT='application/vnd.expenses.columnar+json')
+        week = f'start_date={self.today - timedelta(days=6)}&end_date={self.today}'
+        series = self.client.get(f'/api/expenses/expenses/timeseries/?{week}&format=columnar').json()
+        json_series = self.client.get(f'/api/expenses/expenses/timeseries/?{week}').json()
+
+        self.assertEqual(stats.json()['total_expenses'], 116050)
+        self.assertEqual(stats.json()['category_breakdown']['category'][0], CATEGORIES['food_dining'].id)
+        self.assertEqual(sum(stats.json()['monthly_trend']['amount']), 116050)
+        self.assertEqual(series['date'], list(range(7)))
+        self.assertEqual(series['amount'], [0, 0, 89900, 0, 0, 0, 26150])
+        self.assertEqual([point['count'] for point in json_series['points']], series['count'])
+        self.assertEqual(json_series['start'], (self.today - timedelta(days=6)).isoformat())
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_encoding(self):
+        response = self.client.get('/api/expenses/expenses/timeseries/?format=columnar-msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.expenses.columnar+msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['amount'][-5:], [89900, 0, 0, 0, 26150])
+
+    def test_other_actions_do_not_offer_columnar(self):
+        self.assertEqual(self.client.get('/api/expenses/expenses/recent/?format=columnar').status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SpendingTimeseriesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='judy', password='pass12345')
+        self.client.force_authenticate(self.user)
+        for day, amount, category, payment_method in [
+            (date(2024, 12, 30), '100.00', 'groceries', 'cash'),
+            (date(2025, 1, 2), '40.00', 'food_dining', 'upi'),
+            (date(2025, 1, 2), '60.00', 'groceries', 'upi'),
+            (date(2025, 3, 15), '500.00', 'travel', 'card'),
+        ]:
+            Expense.objects.create(
+                user=self.user, title='Spend', amount=Decimal(amount), category=category,
+                payment_method=payment_method, date=day,
+            )
+
+    def get(self, query):
+        return self.client.get(f'/api/expenses/expenses/timeseries/?{query}')
+
+    def test_zero_filled_buckets_in_one_query(self):
+        with self.assertNumQueries(1):
+            daily = self.get('start_date=2024-01-01&end_date=2024-12-31').json()
+
+        self.assertEqual(len(daily['points']), 366)
+        self.assertEqual(daily['points'][-2], {'date': '2024-12-30', 'amount': 100.0, 'count': 1})
+        self.assertEqual(sum(point['count'] for point in daily['points']), 1)
+
+    def test_week_month_and_year_buckets(self):
+        weekly = self.get('granularity=week&start_date=2024-12-30&end_date=2025-01-12').json()
+        monthly = self.get('granularity=month&start_date=2024-12-01&end_date=2025-03-31').json()
+        yearly = self.get('granularity=year&start_date=2024-06-01&end_date=2025-12-31').json()
+
+        self.assertEqual([(p['date'], p['amount']) for p in weekly['points']], [('2024-12-30', 200.0), ('2025-01-06', 0.0)])
+        self.assertEqual([p['amount'] for p in monthly['points']], [100.0, 100.0, 0.0, 500.0])
+        self.assertEqual([(p['date'], p['count']) for p in yearly['points']], [('2024-01-01', 1), ('2025-01-01', 3)])
+
+    def test_filters_and_group_by(self):
+        grouped = self.get(
+            'granularity=month&start_date=2024-12-01&end_date=2025-01-31&payment_method=upi&group_by=category'
+        ).json()
+        columns = self.get(
+            'granularity=month&start_date=2024-12-01&end_date=2025-01-31&group_by=category&format=columnar'
+        ).json()
+
+        self.assertEqual([p['amount'] for p in grouped['points']], [0.0, 100.0])
+        self.assertEqual(
+            [(series['key'], [p['amount'] for p in series['points']]) for series in grouped['series']],
+            [('groceries', [0.0, 60.0]), ('food_dining', [0.0, 40.0])]
+        )
+        self.assertEqual(columns['groups']['key'], [CATEGORIES['groceries'].id, CATEGORIES['food_dining'].id])
+        self.assertEqual(columns['groups']['amount'], [[10000, 6000], [0, 4000]])
+
+    def test_invalid_parameters_and_bucket_cap(self):
+        for query in (
+            'granularity=hour', 'group_by=title', 'start_date=2025-13-01',
+            'start_date=2025-02-01&end_date=2025-01-01', 'start_date=2020-01-01&end_date=2025-01-01',
+        ):
+            self.assertEqual(self.get(query).status_code, 400, query)
+        self.assertEqual(self.get('granularity=week&start_date=2020-01-01&end_date=2025-01-01').status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExpenseKeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='erin', password='pass12345')
+        self.client.force_authenticate(self.user)
+        day = timezone.localdate()
+        # Several rows share a date so the created_at/id tiebreakers matter
+        self.expenses = [
+            Expense.objects.create(
+                user=self.user, title=f'Expense {i}', amount=Decimal('10.00'),
+                date=add_months(day, -(i // 4)),
+            )
+            for i in range(11)
+        ]
+
+    def test_pages_walk_every_row_once_in_list_order(self):
+        seen = []
+        url = '/api/expenses/expenses/?pagination=cursor&page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Expense.objects.filter(user=self.user).order_by('-date', '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_deep_page_costs_one_query(self):
+        first = self.client.get('/api/expenses/expenses/', {'pagination': 'cursor', 'page_size': 8})
+        with self.assertNumQueries(1):
+            self.client.get(first.data['next'])
+
+    def test_count_only_when_requested(self):
+        response = self.client.get('/api/expenses/expenses/', {'pagination': 'cursor', 'include_count': 'true'})
+        self.assertEqual(response.data['count'], 11)
+
+    def test_page_size_is_capped_and_limit_is_accepted(self):
+        response = self.client.get('/api/expenses/expenses/', {'pagination': 'cursor', 'limit': 5000})
+        self.assertEqual(response.data['page_size'], 1000)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/api/expenses/expenses/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryPlanTests(APITestCase):
+    """
+    EXPLAIN every query behind the hot endpoints and fail on full table scans,
+    plus temporary sorts for endpoints that return rows in list order.
+    Runs on SQLite, and on Postgres when DATABASE_URL points the tests there.
+    """
+    ORDERED_PATHS = [
+        '/api/expenses/expenses/',
+        '/api/expenses/expenses/?category=travel',
+        '/api/expenses/expenses/?start_date=2025-01-01&end_date=2025-12-31',
+        '/api/expenses/expenses/?search=exp',
+        '/api/expenses/expenses/?pagination=cursor&page_size=2',
+        '/api/expenses/expenses/recent/',
+        '/api/expenses/budgets/',
+        '/api/expenses/budgets/alerts/',
+    ]
+    AGGREGATE_PATHS = [
+        '/api/expenses/expenses/stats/',
+        '/api/ai/insights/',
+        '/api/ai/recommendations/',
+        '/api/expenses/dashboard/',
+        '/api/expenses/expenses/timeseries/?start_date=2025-01-01&end_date=2025-12-31',
+        '/api/expenses/expenses/timeseries/?granularity=month&category=travel&group_by=payment_method',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='frank', password='pass12345')
+        self.client.force_authenticate(self.user)
+        for i, category in enumerate(['travel', 'shopping', 'travel', 'groceries']):
+            Expense.objects.create(
+                user=self.user, title='Expense', amount=Decimal('25.00'),
+                category=category, date=date(2025, i + 1, 5),
+            )
+        Budget.objects.create(
+            user=self.user, category='travel', amount=Decimal('100.00'),
+            start_date=date(2025, 1, 3), end_date=date(2025, 2, 20),
+        )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def captured_plans(self, path):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return [
+            (query['sql'], self.explain(query['sql']))
+            for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def assert_no_full_scan(self, sql, plan):
+        for line in plan:
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Seq Scan', line, f'{sql}\n{plan}')
+            else:
+                # FTS5 lookups report as "SCAN <table> VIRTUAL TABLE INDEX n:M..."
+                is_full_scan = line.strip().startswith('SCAN') and 'VIRTUAL TABLE INDEX' not in line
+                self.assertFalse(is_full_scan, f'{sql}\n{plan}')
+
+    def assert_no_sort(self, sql, plan):
+        for line in plan:
+            if connection.vendor == 'postgresql':
+                self.assertNotRegex(line, r'\bSort\b', f'{sql}\n{plan}')
+            else:
+                self.assertNotIn('ORDER BY', line, f'{sql}\n{plan}')
+
+    def test_ordered_endpoints_use_indexes_in_list_order(self):
+        for path in self.ORDERED_PATHS:
+            for sql, plan in self.captured_plans(path):
+                self.assert_no_full_scan(sql, plan)
+                if 'ORDER BY' in sql:
+                    self.assert_no_sort(sql, plan)
+
+    def test_aggregate_endpoints_avoid_full_scans(self):
+        for path in self.AGGREGATE_PATHS:
+            for sql, plan in self.captured_plans(path):
+                self.assert_no_full_scan(sql, plan)
+
+    def test_budget_window_lookup_uses_category_index(self):
+        budget = Budget.objects.get(user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            budget._compute_spent_amount()
+        plan = self.explain(context.captured_queries[-1]['sql'])
+        self.assertTrue(any('expense_user_cat_date_idx' in line for line in plan), plan)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExpenseSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='grace', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.coffee = self.add_expense('Coffee at Starbucks', 'Morning latte')
+        self.groceries = self.add_expense('Weekly groceries', 'Vegetables and coffee beans')
+        self.taxi = self.add_expense('Uber ride', 'Airport drop')
+
+    def add_expense(self, title, description):
+        return Expense.objects.create(
+            user=self.user, title=title, description=description,
+            amount=Decimal('10.00'), date=timezone.localdate(),
+        )
+
+    def search(self, text, **params):
+        response = self.client.get('/api/expenses/expenses/', {'search': text, **params})
+        return [item['id'] for item in response.data['results']]
+
+    def test_prefix_match_over_title_and_description(self):
+        self.assertEqual(set(self.search('coff')), {self.coffee.id, self.groceries.id})
+        self.assertEqual(self.search('uber airport'), [self.taxi.id])
+        self.assertEqual(self.search('ffee'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.taxi.title = 'Metro card'
+        self.taxi.save()
+        self.assertEqual(self.search('uber'), [])
+        self.assertEqual(self.search('metro'), [self.taxi.id])
+
+        self.coffee.delete()
+        self.assertEqual(self.search('starbucks'), [])
+
+    def test_relevance_ordering(self):
+        ids = self.search('coffee', ordering='relevance')
+        self.assertEqual(ids[0], self.coffee.id)
+
+    def test_other_users_rows_are_not_returned(self):
+        other = User.objects.create_user(username='heidi', password='pass12345')
+        Expense.objects.create(user=other, title='Coffee', amount=Decimal('5.00'), date=timezone.localdate())
+        self.assertEqual(set(self.search('coffee')), {self.coffee.id, self.groceries.id})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class StatementImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ivan', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content, **data):
+        statement = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post('/api/expenses/expenses/import/', {'file': statement, **data}, format='multipart')
+
+    def test_csv_import_validates_rows_and_categorizes(self):
+        response = self.upload('statement.csv', (
+            'Date,Title,Amount,Category\n'
+            '2025-03-01,Swiggy dinner,450.50,\n'
+            '02/03/2025,Electricity bill,1200,utilities\n'
+            'not-a-date,Broken row,12,\n'
+            '2025-03-04,Mystery,abc,\n'
+            '2025-03-05,Gift,100,Gifts & Donations\n'
+        ))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+        self.assertIn('date', response.data['errors'][0]['errors'])
+        self.assertIn('amount', response.data['errors'][1]['errors'])
+
+        swiggy = Expense.objects.get(user=self.user, title='Swiggy dinner')
+        self.assertEqual(swiggy.category, 'food_dining')
+        self.assertTrue(swiggy.is_ai_categorized)
+        self.assertEqual(Expense.objects.get(title='Gift').category, 'gifts_donations')
+        self.assertEqual(
+            ExpenseRollup.objects.filter(user=self.user).aggregate(total=Sum('total'), count=Sum('count')),
+            {'total': Decimal('1750.50'), 'count': 3},
+        )
+
+    def test_ofx_import_skips_credits(self):
+        response = self.upload('bank.ofx', (
+            'OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250310120000<TRNAMT>-250.00<NAME>UBER TRIP<MEMO>Airport</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250311<TRNAMT>5000.00<NAME>SALARY</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        ))
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['skipped'], 1)
+        expense = Expense.objects.get(user=self.user)
+        self.assertEqual((expense.title, expense.amount, expense.date), ('UBER TRIP', Decimal('250.00'), date(2025, 3, 10)))
+        self.assertEqual(expense.payment_method, 'bank_transfer')
+
+    def test_qif_import_with_explicit_date_format(self):
+        response = self.upload('bank.qif', (
+            '!Type:Bank\nD03/15/2025\nT-99.00\nPNetflix\n^\nD03/16/2025\nT-45.00\nPCoffee shop\nMLatte\n^\n'
+        ), date_format='%m/%d/%Y')
+
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            set(Expense.objects.filter(user=self.user).values_list('title', 'date')),
+            {('Netflix', date(2025, 3, 15)), ('Coffee shop', date(2025, 3, 16))},
+        )
+
+    def test_dry_run_inserts_nothing(self):
+        response = self.upload('statement.csv', 'Date,Title,Amount\n2025-03-01,Lunch,100\n', dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload('statement.pdf', 'nope')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExpenseExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='judy', password='pass12345')
+        self.client.force_authenticate(self.user)
+        Expense.objects.create(
+            user=self.user, title='=HYPERLINK("x")', description='Notes, with comma',
+            amount=Decimal('12.50'), category='travel', payment_method='upi', date=date(2025, 4, 2),
+        )
+        Expense.objects.create(
+            user=self.user, title='Groceries', amount=Decimal('99.00'),
+            category='groceries', date=date(2025, 5, 9),
+        )
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/api/expenses/expenses/export/', {'category': 'travel'})
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ['Date', 'Title', 'Category', 'Amount', 'Payment Method', 'Description'])
+        self.assertEqual(rows[1:], [
+            ['2025-04-02', '\'=HYPERLINK("x")', 'Travel', '12.50', 'UPI', 'Notes, with comma'],
+        ])
+
+    def test_xlsx_export_is_a_valid_workbook(self):
+        response = self.client.get('/api/expenses/expenses/export/', {'export_format': 'xlsx'})
+
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(sheet.count('<row>'), 3)
+        self.assertIn('<c s="2"><v>99.00</v></c>', sheet)
+        self.assertIn(f'<c s="1"><v>{(date(2025, 5, 9) - date(1899, 12, 30)).days}</v></c>', sheet)
+
+    def test_unknown_export_format_is_rejected(self):
+        response = self.client.get('/api/expenses/expenses/export/', {'export_format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ReceiptStorageTests(APITestCase):
+    url = '/api/expenses/expenses/'
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='judy', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def photo(self, color='white', size=(3000, 2000)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, format='JPEG', quality=95)
+        return SimpleUploadedFile('IMG_0001.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def create(self, receipt):
+        return self.client.post(self.url, {
+            'title': 'Groceries', 'amount': '250.00', 'category': 'groceries',
+            'payment_method': 'upi', 'date': '2025-06-01', 'receipt_image': receipt,
+        }, format='multipart')
+
+    def test_receipt_is_stored_as_capped_webp_with_thumbnail(self):
+        response = self.create(self.photo())
+
+        self.assertEqual(response.status_code, 201)
+        name = Expense.objects.get().receipt_image.name
+        self.assertRegex(name, rf'^receipts/{self.user.id}/[0-9a-f]{{2}}/[0-9a-f]{{64}}\.webp$')
+        with default_storage.open(name) as stored:
+            image = Image.open(stored)
+            self.assertEqual((image.format, max(image.size)), ('WEBP', 2000))
+        self.assertTrue(response.data['receipt_thumbnail'].endswith(name.replace('.webp', '_thumb.webp')))
+        with default_storage.open(name.replace('.webp', '_thumb.webp')) as stored:
+            self.assertEqual(max(Image.open(stored).size), 320)
+
+    def test_same_image_is_stored_once_and_kept_until_unused(self):
+        self.create(self.photo())
+        self.create(self.photo())
+        first, second = Expense.objects.order_by('id')
+
+        self.assertEqual(first.receipt_image.name, second.receipt_image.name)
+        name = first.receipt_image.name
+        self.assertEqual(len(default_storage.listdir(name.rsplit('/', 1)[0])[1]), 2)  # image + thumbnail
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replaced_receipt_is_deleted_after_commit(self):
+        self.create(self.photo())
+        expense = Expense.objects.get()
+        old = expense.receipt_image.name
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'{self.url}{expense.id}/', {'receipt_image': self.photo('red')}, format='multipart')
+        self.assertTrue(default_storage.exists(old))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(old))
+
+    def test_concurrent_upload_of_same_image_reuses_stored_file(self):
+        self.create(self.photo())
+        name = Expense.objects.get().receipt_image.name
+
+        # The other upload finishes writing each file just after this one first checks for it
+        real_exists, checked = default_storage.exists, set()
+
+        def exists(name):
+            seen = name in checked
+            checked.add(name)
+            return seen and real_exists(name)
+
+        with mock.patch.object(default_storage, 'exists', side_effect=exists):
+            self.create(self.photo())
+
+        self.assertEqual(Expense.objects.order_by('-id')[0].receipt_image.name, name)
+        self.assertEqual(len(default_storage.listdir(name.rsplit('/', 1)[0])[1]), 2)  # no suffixed copies
+
+    def test_legacy_receipts_are_never_deleted(self):
+        legacy = default_storage.save('receipts/IMG_0001.jpg', ContentFile(b'legacy receipt'))
+        expense = Expense.objects.create(
+            user=self.user, title='Old', amount=Decimal('10.00'), category='groceries',
+            date=date(2024, 1, 1), receipt_image=legacy,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'{self.url}{expense.id}/', {'receipt_image': self.photo()}, format='multipart')
+        self.assertTrue(default_storage.exists(legacy))
+
+        other = Expense.objects.create(
+            user=self.user, title='Old too', amount=Decimal('10.00'), category='groceries',
+            date=date(2024, 1, 2), receipt_image=legacy,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertTrue(default_storage.exists(legacy))
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ExpenseViewSet, BudgetViewSet
+from .views import CategoryViewSet, ExpenseViewSet, BudgetViewSet, dashboard
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='categories')
@@ -8,5 +8,6 @@ router.register(r'expenses', ExpenseViewSet, basename='expenses')
 router.register(r'budgets', BudgetViewSet, basename='budgets')
 
 urlpatterns = [
+    path('dashboard/', dashboard, name='dashboard'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,17 +1,29 @@
 # backend/expenses/views.py - SIMPLIFIED FOR HARDCODED CATEGORIES
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Avg, Q
+from rest_framework.parsers import MultiPartParser, FormParser
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
-import calendar
+from django.utils.cache import patch_vary_headers
+from datetime import date
 import logging
 
 from .models import Category, Expense, Budget
+from .categories import CATEGORIES
+from .cache import cached_for_user, conditional_get, with_cache_status
+from .analytics import (
+    budget_alerts, bucket_count, default_timeseries_start, expense_stats_snapshot, get_expense_stats, spending_timeseries,
+    DEFAULT_STATS_MONTHS, MAX_STATS_MONTHS, MAX_TIMESERIES_BUCKETS, TIMESERIES_GRANULARITIES, TIMESERIES_GROUPS
+)
+from .dashboard import SECTIONS as DASHBOARD_SECTIONS, build_dashboard
+from .columnar import COLUMNAR_RENDERERS, expense_columns, is_columnar, stats_columns, timeseries_columns
+from .pagination import ExpenseKeysetPagination
+from .importers import PARSERS, StatementImporter, StatementImportError, detect_format
+from .exporters import EXPORT_FORMATS, export_rows
 from .serializers import (
-    CategorySerializer, ExpenseSerializer, BudgetSerializer, ExpenseStatsSerializer
+    CategorySerializer, ExpenseSerializer, ExpenseRowSerializer, BudgetSerializer, ExpenseStatsSerializer
 )
 
 logger = logging.getLogger(__name__)
@@ -27,29 +39,36 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def hardcoded_list(self, request):
         """Return hardcoded categories that match frontend"""
-        categories = [
-            {'id': 1, 'name': 'Food & Dining', 'icon': '🍽️', 'color': '#FF6B6B', 'value': 'food_dining'},
-            {'id': 2, 'name': 'Transportation', 'icon': '🚗', 'color': '#4ECDC4', 'value': 'transportation'},
-            {'id': 3, 'name': 'Shopping', 'icon': '🛍️', 'color': '#45B7D1', 'value': 'shopping'},
-            {'id': 4, 'name': 'Entertainment', 'icon': '🎬', 'color': '#96CEB4', 'value': 'entertainment'},
-            {'id': 5, 'name': 'Healthcare', 'icon': '🏥', 'color': '#FFEAA7', 'value': 'healthcare'},
-            {'id': 6, 'name': 'Utilities', 'icon': '⚡', 'color': '#DDA0DD', 'value': 'utilities'},
-            {'id': 7, 'name': 'Education', 'icon': '📚', 'color': '#98D8C8', 'value': 'education'},
-            {'id': 8, 'name': 'Groceries', 'icon': '🛒', 'color': '#F7DC6F', 'value': 'groceries'},
-            {'id': 9, 'name': 'Fitness', 'icon': '💪', 'color': '#BB8FCE', 'value': 'fitness'},
-            {'id': 10, 'name': 'Travel', 'icon': '✈️', 'color': '#85C1E9', 'value': 'travel'},
-            {'id': 11, 'name': 'Bills & Subscriptions', 'icon': '📄', 'color': '#F8C471', 'value': 'bills_subscriptions'},
-            {'id': 12, 'name': 'Clothing', 'icon': '👕', 'color': '#82E0AA', 'value': 'clothing'},
-            {'id': 13, 'name': 'Electronics', 'icon': '📱', 'color': '#AED6F1', 'value': 'electronics'},
-            {'id': 14, 'name': 'Home & Garden', 'icon': '🏠', 'color': '#A9DFBF', 'value': 'home_garden'},
-            {'id': 15, 'name': 'Gifts & Donations', 'icon': '🎁', 'color': '#F1948A', 'value': 'gifts_donations'},
-            {'id': 16, 'name': 'Other', 'icon': '💰', 'color': '#D5DBDB', 'value': 'other'},
-        ]
-        return Response(categories)
+        return Response([info.payload() for info in CATEGORIES.values()])
 
 class ExpenseViewSet(viewsets.ModelViewSet):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated]
+    # Actions that can also answer in the compact columnar format (see columnar.py)
+    columnar_actions = ('list', 'stats', 'timeseries')
+    
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action in self.columnar_actions:
+            renderers += [renderer() for renderer in COLUMNAR_RENDERERS]
+        return renderers
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action in self.columnar_actions:
+            patch_vary_headers(response, ('Accept',))
+        return response
+    
+    @property
+    def paginator(self):
+        """Opt into keyset pagination with ?pagination=cursor (or a cursor param)"""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = ExpenseKeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
     
     def get_queryset(self):
         queryset = Expense.objects.filter(user=self.request.user)
@@ -65,16 +84,27 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         if category:
             queryset = queryset.filter(category=category)
         
-        # Search functionality
+        # Search functionality (indexed prefix search, optionally ranked)
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
+            ranked = self.request.query_params.get('ordering') == 'relevance'
+            queryset = queryset.search(search, ranked=ranked)
+            if ranked:
+                return queryset.order_by('-search_rank', '-date', '-created_at')
         
         return queryset.order_by('-date', '-created_at')
     
+    @conditional_get('expense_list')
+    def list(self, request, *args, **kwargs):
+        # Read-only pages skip model instantiation (see ExpenseRowSerializer)
+        rows = ExpenseRowSerializer.rows(self.filter_queryset(self.get_queryset()))
+        serializer = ExpenseRowSerializer(context=self.get_serializer_context())
+        serialize = expense_columns if is_columnar(request) else serializer.serialize
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize(page))
+        return Response(serialize(rows))
+    
     def create(self, request, *args, **kwargs):
         """Enhanced create method with detailed logging"""
         logger.info("=== DEBUG: Creating Expense ===")
@@ -82,11 +112,12 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         logger.info(f"Request files: {request.FILES}")
         logger.info(f"Request user: {request.user}")
         
-        # Clean the data before serialization
-        data = request.data.copy()
+        # Clean the data before serialization (copying would duplicate any uploaded file)
+        data = request.data
         
         # Handle empty receipt_image
         if 'receipt_image' in data and (not data['receipt_image'] or data['receipt_image'] == ''):
+            data = data.copy()
             data.pop('receipt_image')
             logger.info("Removed empty receipt_image from data")
         
@@ -112,11 +143,12 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         logger.info(f"=== DEBUG: Updating Expense {kwargs.get('pk')} ===")
         logger.info(f"Request data: {request.data}")
         
-        # Clean the data before serialization
-        data = request.data.copy()
+        # Clean the data before serialization (copying would duplicate any uploaded file)
+        data = request.data
         
         # Handle empty receipt_image
         if 'receipt_image' in data and (not data['receipt_image'] or data['receipt_image'] == ''):
+            data = data.copy()
             data.pop('receipt_image')
             logger.info("Removed empty receipt_image from data")
         
@@ -140,99 +172,181 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['get'])
+    @conditional_get('stats')
     def stats(self, request):
         """Get expense statistics for the current user"""
-        user_expenses = Expense.objects.filter(user=request.user)
-        
-        # Basic stats
-        total_expenses = user_expenses.aggregate(total=Sum('amount'))['total'] or 0
-        total_transactions = user_expenses.count()
-        avg_transaction = user_expenses.aggregate(avg=Avg('amount'))['avg'] or 0
-        
-        # Top category
-        top_category_data = user_expenses.values('category').annotate(
-            total=Sum('amount')
-        ).order_by('-total').first()
-        
-        if top_category_data:
-            # Get the display name for the category
-            expense_obj = Expense(category=top_category_data['category'])
-            top_category_name = expense_obj.category_name
+        try:
+            months = int(request.query_params.get('months', DEFAULT_STATS_MONTHS))
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'months must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        months = max(1, min(months, MAX_STATS_MONTHS))
+        
+        if is_columnar(request):
+            stats_data, hit = cached_for_user(
+                request.user, 'stats_columnar',
+                lambda: stats_columns(expense_stats_snapshot(request.user, months=months)),
+                months
+            )
         else:
-            top_category_name = 'None'
-        
-        # Monthly trend (last 6 months)
-        monthly_trend = []
-        for i in range(6):
-            date = timezone.now() - timedelta(days=30*i)
-            month_expenses = user_expenses.filter(
-                date__year=date.year,
-                date__month=date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            monthly_trend.insert(0, {
-                'month': calendar.month_name[date.month],
-                'amount': float(month_expenses)
-            })
-        
-        # Category breakdown
-        category_breakdown = []
-        category_data = user_expenses.values('category').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('-total')[:5]
-        
-        for item in category_data:
-            expense_obj = Expense(category=item['category'])
-            category_breakdown.append({
-                'category__name': expense_obj.category_name,
-                'category__color': expense_obj.category_color,
-                'total': float(item['total']),
-                'count': item['count']
-            })
-        
-        stats_data = {
-            'total_expenses': total_expenses,
-            'total_transactions': total_transactions,
-            'avg_transaction': avg_transaction,
-            'top_category': top_category_name,
-            'monthly_trend': monthly_trend,
-            'category_breakdown': category_breakdown
-        }
-        
-        serializer = ExpenseStatsSerializer(stats_data)
-        return Response(serializer.data)
+            stats_data, hit = cached_for_user(
+                request.user, 'stats',
+                lambda: ExpenseStatsSerializer(get_expense_stats(request.user, months=months)).data,
+                months
+            )
+        return with_cache_status(Response(stats_data), hit)
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get('timeseries')
+    def timeseries(self, request):
+        """
+        Spending per day/week/month/year bucket, zero-filled, in one query.
+        ?granularity=, ?start_date=/?end_date= (default: the last few buckets),
+        ?category=, ?payment_method= and ?group_by=category|payment_method.
+        """
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        if granularity not in TIMESERIES_GRANULARITIES:
+            return Response({
+                'error': f"granularity must be one of {', '.join(TIMESERIES_GRANULARITIES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        group_by = params.get('group_by') or None
+        if group_by is not None and group_by not in TIMESERIES_GROUPS:
+            return Response({
+                'error': f"group_by must be one of {', '.join(TIMESERIES_GROUPS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = date.fromisoformat(params['end_date']) if params.get('end_date') else timezone.localdate()
+            start = (
+                date.fromisoformat(params['start_date']) if params.get('start_date')
+                else default_timeseries_start(end, granularity)
+            )
+        except ValueError:
+            return Response({
+                'error': 'start_date and end_date must be YYYY-MM-DD dates'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({
+                'error': 'start_date must not be after end_date'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        buckets = bucket_count(start, end, granularity)
+        if buckets > MAX_TIMESERIES_BUCKETS:
+            return Response({
+                'error': f'The range spans {buckets} {granularity} buckets; at most '
+                         f'{MAX_TIMESERIES_BUCKETS} are allowed, use a shorter range or coarser granularity'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        payment_method = params.get('payment_method')
+        if payment_method:
+            queryset = queryset.filter(payment_method=payment_method)
+        series = spending_timeseries(queryset, start, end, granularity, group_by)
+        
+        payload = {'granularity': granularity, 'start': start, 'end': end, 'group_by': group_by}
+        if is_columnar(request):
+            payload.update(timeseries_columns(series, group_by))
+            return Response(payload)
+        
+        def points(values):
+            return [{'date': bucket, 'amount': float(amount), 'count': count} for bucket, amount, count in values]
+        
+        payload['points'] = points(series['totals'])
+        if group_by:
+            payload['series'] = [{'key': key, 'points': points(values)} for key, values in series['groups'].items()]
+        return Response(payload)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_statement(self, request):
+        """Bulk import expenses from a CSV, OFX or QIF statement upload"""
+        statement = request.FILES.get('file')
+        if statement is None:
+            return Response({
+                'error': 'Statement file is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            statement_format = detect_format(statement.name, request.data.get('statement_format'))
+        except StatementImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        default_payment_method = request.data.get('payment_method') or (
+            'cash' if statement_format == 'csv' else 'bank_transfer'
+        )
+        importer = StatementImporter(
+            request.user,
+            default_payment_method=default_payment_method,
+            date_format=request.data.get('date_format') or None,
+            dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true'),
+        )
+        report = importer.run(PARSERS[statement_format](statement))
+        report['format'] = statement_format
+        logger.info(
+            f"Imported {report['created']} expenses for {request.user} "
+            f"({report['failed']} failed, {report['skipped']} skipped)"
+        )
+        
+        response_status = status.HTTP_201_CREATED if report['created'] and not report['dry_run'] else status.HTTP_200_OK
+        return Response(report, status=response_status)
     
     @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered expense list as CSV or XLSX (?export_format=csv|xlsx)"""
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'error': 'export_format must be csv or xlsx'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        writer, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            writer(export_rows(self.get_queryset())),
+            content_type=content_type
+        )
+        filename = f"expenses_{timezone.localdate().isoformat()}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get('recent')
     def recent(self, request):
         """Get recent expenses"""
-        recent_expenses = self.get_queryset()[:10]
-        serializer = self.get_serializer(recent_expenses, many=True)
-        return Response(serializer.data)
+        recent_expenses = ExpenseRowSerializer.rows(self.get_queryset())[:10]
+        serializer = ExpenseRowSerializer(context=self.get_serializer_context())
+        return Response(serializer.serialize(recent_expenses))
 
 class BudgetViewSet(viewsets.ModelViewSet):
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Budget.objects.filter(user=self.request.user, is_active=True)
+        return Budget.objects.filter(user=self.request.user, is_active=True).with_spent_amount()
+    
+    @conditional_get('budget_list')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
+    @conditional_get('budget_alerts')
     def alerts(self, request):
         """Get budget alerts for overspending"""
-        budgets = self.get_queryset()
-        alerts = []
-        
-        for budget in budgets:
-            if budget.progress_percentage >= 80:
-                alert_type = 'danger' if budget.progress_percentage >= 100 else 'warning'
-                alerts.append({
-                    'id': budget.id,
-                    'category': budget.category_name,
-                    'message': f"You've spent {budget.progress_percentage:.1f}% of your {budget.category_name} budget",
-                    'type': alert_type,
-                    'spent': budget.spent_amount,
-                    'budget': budget.amount
-                })
-        
-        return Response(alerts)
\ No newline at end of file
+        alerts, hit = cached_for_user(request.user, 'budget_alerts', self.build_alerts)
+        return with_cache_status(Response(alerts), hit)
+    
+    def build_alerts(self):
+        return budget_alerts(self.get_queryset())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('dashboard')
+def dashboard(request):
+    """Stats, recent expenses, budget alerts and insights in one response (?sections=stats,alerts)"""
+    requested = request.query_params.get('sections')
+    sections = [section.strip() for section in requested.split(',') if section.strip()] if requested else DASHBOARD_SECTIONS
+    unknown = [section for section in sections if section not in DASHBOARD_SECTIONS]
+    if unknown or not sections:
+        return Response({
+            'error': f"sections must be a comma-separated subset of {', '.join(DASHBOARD_SECTIONS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(build_dashboard(request, sections))
\ No newline at end of file
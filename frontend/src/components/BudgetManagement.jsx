@@ -62,7 +62,7 @@ const BudgetManagement = ({ user, isOpen, onClose }) => {
     try {
       const [budgetsData, expensesData] = await Promise.all([
         expenseService.getBudgets(),
-        expenseService.getExpenses({ limit: 1000 })
+        expenseService.getExpenses({ pagination: 'cursor', limit: 1000 })
       ]);
 
       setBudgets(budgetsData.results || budgetsData);
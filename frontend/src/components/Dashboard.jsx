@@ -27,17 +27,12 @@ const Dashboard = ({ user }) => {
 
   const fetchDashboardData = async () => {
     try {
-      const [statsData, recentData, alertsData, insightsData] = await Promise.all([
-        expenseService.getStats(),
-        expenseService.getRecentExpenses(),
-        expenseService.getBudgetAlerts(),
-        expenseService.getAIInsights()
-      ]);
+      const { stats: statsData, recent, alerts, insights: insightsData } = await expenseService.getDashboard();
 
       setStats(statsData);
-      setRecentExpenses(recentData);
-      setBudgetAlerts(alertsData);
-      setInsights(insightsData.insights || []);
+      setRecentExpenses(recent || []);
+      setBudgetAlerts(alerts || []);
+      setInsights(insightsData?.insights || []);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
     } finally {
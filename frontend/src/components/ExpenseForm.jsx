@@ -87,8 +87,8 @@ const ExpenseForm = ({ isOpen, onClose, onExpenseAdded, editingExpense = null })
         title, 
         description: formData.description 
       });
-      if (suggestion.suggested_category?.name) {
-        setAiSuggestion(suggestion.suggested_category.name);
+      if (suggestion.suggested_category?.value) {
+        setAiSuggestion(suggestion.suggested_category.value);
       }
     } catch (error) {
       console.error('Error getting AI suggestion:', error);
@@ -115,7 +115,7 @@ const ExpenseForm = ({ isOpen, onClose, onExpenseAdded, editingExpense = null })
         ...prev,
         title: result.merchant || prev.title,
         amount: result.amount ? result.amount.toString() : prev.amount,
-        category: result.suggested_category?.name || prev.category,
+        category: result.suggested_category?.value || prev.category,
       }));
       
       toast.success('Receipt scanned successfully! 📄✨');
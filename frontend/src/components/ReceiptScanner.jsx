@@ -11,8 +11,8 @@ const ReceiptScanner = ({ onScanResult, onClose }) => {
   const handleFileUpload = async (file) => {
     if (!file) return;
 
-    if (!file.type.startsWith('image/')) {
-      toast.error('Please upload an image file');
+    if (!file.type.startsWith('image/') && file.type !== 'application/pdf') {
+      toast.error('Please upload an image or PDF file');
       return;
     }
 
@@ -96,14 +96,14 @@ const ReceiptScanner = ({ onScanResult, onClose }) => {
                   <input
                     id="receipt-file"
                     type="file"
-                    accept="image/*"
+                    accept="image/*,application/pdf"
                     onChange={handleFileInput}
                     style={{ display: 'none' }}
                   />
                 </div>
 
                 <div className="supported-formats">
-                  <small>Supported formats: JPG, PNG, WEBP</small>
+                  <small>Supported formats: JPG, PNG, WEBP, PDF</small>
                 </div>
               </div>
             )}
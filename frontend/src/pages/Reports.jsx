@@ -29,7 +29,7 @@ const Reports = ({ user }) => {
     try {
       const [statsData, expensesData, insightsData] = await Promise.all([
         expenseService.getStats(),
-        expenseService.getExpenses({ limit: 100 }),
+        expenseService.getExpenses({ pagination: 'cursor', limit: 100 }),
         expenseService.getAIInsights()
       ]);
 
@@ -44,17 +44,19 @@ const Reports = ({ user }) => {
     }
   };
 
-  const handleExport = (format) => {
+  const handleExport = async (format) => {
     setShowExportMenu(false);
     
     switch (format) {
       case 'csv':
-        exportService.exportToCSV(expenses, 'expense_report');
-        toast.success('CSV report downloaded! 📄');
-        break;
       case 'excel':
-        exportService.exportToExcel(expenses, stats, 'expense_report');
-        toast.success('Excel report downloaded! 📊');
+        // Full history is exported by the server, not just the rows loaded on this page
+        try {
+          await expenseService.exportExpenses(format === 'csv' ? 'csv' : 'xlsx');
+          toast.success(format === 'csv' ? 'CSV report downloaded! 📄' : 'Excel report downloaded! 📊');
+        } catch (error) {
+          toast.error('Failed to export report');
+        }
         break;
       case 'pdf':
         exportService.generatePDFReport(expenses, stats, insights);
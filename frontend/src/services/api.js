@@ -152,6 +152,43 @@ export const expenseService = {
     }
   },
 
+  // Zero-filled spending per bucket, aggregated server-side
+  // params: granularity (day|week|month|year), start_date, end_date, category, payment_method, group_by
+  getTimeseries: async (params = {}) => {
+    try {
+      const queryString = new URLSearchParams(params).toString();
+      const response = await api.get(`/expenses/expenses/timeseries/?${queryString}`);
+      return response.data;
+    } catch (error) {
+      console.error('❌ Error fetching timeseries:', error);
+      throw error;
+    }
+  },
+
+  // Download the full filtered expense history as a server-streamed CSV/XLSX file
+  exportExpenses: async (exportFormat = 'csv', params = {}) => {
+    try {
+      const queryString = new URLSearchParams({ ...params, export_format: exportFormat }).toString();
+      const response = await api.get(`/expenses/expenses/export/?${queryString}`, {
+        responseType: 'blob',
+        timeout: 0,
+      });
+      const disposition = response.headers['content-disposition'] || '';
+      const match = disposition.match(/filename="([^"]+)"/);
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = match ? match[1] : `expenses.${exportFormat}`;
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('❌ Error exporting expenses:', error);
+      throw error;
+    }
+  },
+
   // Get recent expenses
   getRecentExpenses: async () => {
     try {
@@ -163,6 +200,19 @@ export const expenseService = {
     }
   },
 
+  // Stats, recent expenses, budget alerts and AI insights in one request
+  // sections: any of 'stats', 'recent', 'alerts', 'insights' (default: all)
+  getDashboard: async (sections = []) => {
+    try {
+      const query = sections.length ? `?sections=${sections.join(',')}` : '';
+      const response = await api.get(`/expenses/dashboard/${query}`);
+      return response.data;
+    } catch (error) {
+      console.error('❌ Error fetching dashboard:', error);
+      return { stats: null, recent: [], alerts: [], insights: { insights: [] } };
+    }
+  },
+
   // REMOVED: All category API methods - categories are now hardcoded
   // getCategories, createCategory, updateCategory, deleteCategory
 
@@ -245,12 +295,24 @@ export const expenseService = {
       console.error('❌ Error categorizing expense:', error);
       return {
         suggested_category: {
-          name: 'other'
+          value: 'other',
+          name: 'Other'
         }
       };
     }
   },
 
+  // items: [{ title, description }] -> { results: [{ category, confidence }], categories }
+  categorizeExpenses: async (items) => {
+    try {
+      const response = await api.post('/ai/categorize/', { items });
+      return response.data;
+    } catch (error) {
+      console.error('❌ Error categorizing expenses:', error);
+      throw error;
+    }
+  },
+
   scanReceipt: async (formData) => {
     try {
       const response = await api.post('/ai/scan-receipt/', formData, {
@@ -264,6 +326,26 @@ export const expenseService = {
       throw error;
     }
   },
+
+  // Queue the scan (async=true) and poll its job until the OCR worker finishes it.
+  // Resolves with the same payload as scanReceipt.
+  scanReceiptAsync: async (formData, { interval = 1000, timeout = 120000 } = {}) => {
+    formData.append('async', 'true');
+    const { data: job } = await api.post('/ai/scan-receipt/', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    const statusUrl = job.status_url.replace(/^\/api/, '');
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, interval));
+      const { data } = await api.get(statusUrl);
+      if (data.status === 'done') return data.result;
+      if (data.status === 'failed') throw new Error(data.error || 'Failed to process receipt');
+    }
+    throw new Error('Timed out waiting for the receipt scan');
+  },
 };
 
 export default api;
\ No newline at end of file